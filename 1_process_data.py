@@ -1,9 +1,12 @@
 import pandas as pd
 import os
 
+from sumero_core.pilot_labels import WHOOP_RULES, label_survey_frame
+from sumero_core.storage import pilot_path, save_pilot
+
 # Define paths
 raw_data_path = "Sleep_health_and_lifestyle_dataset.csv"
-clean_data_path = "pilot_clean.csv"
+clean_data_path = None # None: pilot_path() when the stage runs
 
 def process_data():
     if not os.path.exists(raw_data_path):
@@ -21,20 +24,8 @@ def process_data():
     ]
     df = df[cols_to_keep]
 
-    # STEP 2 — Add Enhanced Health State Column
-    def assign_health_state(row):
-        sleep = row["Sleep Duration"]
-        stress = row["Stress Level"]
-        disorder = str(row["Sleep Disorder"])
-        
-        if sleep <= 6.1 or (disorder != "nan" and disorder != "None"):
-            return "Under-Recovered"
-        elif sleep >= 7.0 and stress <= 6:
-            return "Optimal"
-        else:
-            return "Balanced"
-
-    df["health_state"] = df.apply(assign_health_state, axis=1)
+    # STEP 2 — Add Enhanced Health State Column (rules in sumero_core/pilot_labels.py)
+    df["health_state"] = label_survey_frame(df, WHOOP_RULES)
 
     # STEP 3 — Use Complete Dataset
     print(f"Dataset Size: {len(df)}")
@@ -42,8 +33,12 @@ def process_data():
     print(df["health_state"].value_counts())
 
     # Save complete cleaned data
-    df.to_csv(clean_data_path, index=False)
-    print(f"\nSaved {len(df)} rows to {clean_data_path}")
+    out_path = clean_data_path or pilot_path()
+    save_pilot(df, out_path)
+    print(f"\nSaved {len(df)} rows to {out_path}")
 
 if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
     process_data()
@@ -0,0 +1,114 @@
+import xml.etree.ElementTree as ET
+import argparse
+import csv
+import importlib.util
+import os
+
+# Paths
+export_path = "apple_health_export/export.xml"
+apple_hr_path = "applewatchhrv/heart_rate_data.csv"
+apple_sleep_path = "applewatchhrv/sleep_data.csv"
+
+HEART_RATE_TYPE = "HKQuantityTypeIdentifierHeartRate"
+SLEEP_TYPE = "HKCategoryTypeIdentifierSleepAnalysis"
+
+# Apple sleep-analysis values -> Category labels used in applewatchhrv/sleep_data.csv
+# (InBed is a time-in-bed marker, not a sleep stage, and is skipped)
+SLEEP_CATEGORIES = {
+    "HKCategoryValueSleepAnalysisAsleepCore": "Light/Core",
+    "HKCategoryValueSleepAnalysisAsleepDeep": "Deep",
+    "HKCategoryValueSleepAnalysisAsleepREM": "REM",
+    "HKCategoryValueSleepAnalysisAwake": "Awake",
+    "HKCategoryValueSleepAnalysisAsleepUnspecified": "Unspecified",
+    "HKCategoryValueSleepAnalysisAsleep": "Unspecified",
+}
+
+def local_time(apple_date):
+    """'2022-09-13 01:46:47 -0700' -> '2022-09-13 01:46:47' (wall-clock time, as in the CSVs)."""
+    return apple_date[:19]
+
+def parse_export(export_path=export_path, hr_path=apple_hr_path, sleep_path=apple_sleep_path):
+    """
+    Streams an Apple Health export.xml into the heart-rate and sleep CSVs that
+    1c_aggregate_apple.py reads. Elements are discarded as soon as they are handled,
+    so peak memory stays flat regardless of export size. Output goes to temporary
+    files that replace the CSVs only once the whole export has been parsed.
+    """
+    print(f"🚀 Streaming {export_path}...")
+    hr_count = sleep_count = 0
+    hr_tmp, sleep_tmp = hr_path + ".tmp", sleep_path + ".tmp"
+
+    with open(hr_tmp, "w", newline="") as hr_file, open(sleep_tmp, "w", newline="") as sleep_file:
+        hr_writer = csv.writer(hr_file)
+        sleep_writer = csv.writer(sleep_file)
+        hr_writer.writerow(["Timestamp", "Heart Rate"])
+        # Timestamp / Heart Rate (nearest HR sample) cannot be joined in a single pass; left empty
+        sleep_writer.writerow(["Start Time", "End Time", "Category", "Timestamp", "Heart Rate", "Source Name"])
+
+        root = None
+        depth = 0
+        for event, elem in ET.iterparse(export_path, events=("start", "end")):
+            if event == "start":
+                if root is None:
+                    root = elem
+                depth += 1
+                continue
+
+            depth -= 1
+            if elem.tag == "Record":
+                record_type = elem.get("type")
+                if record_type == HEART_RATE_TYPE:
+                    hr_writer.writerow([local_time(elem.get("startDate")), elem.get("value")])
+                    hr_count += 1
+                elif record_type == SLEEP_TYPE:
+                    category = SLEEP_CATEGORIES.get(elem.get("value"))
+                    if category:
+                        sleep_writer.writerow([
+                            local_time(elem.get("startDate")),
+                            local_time(elem.get("endDate")),
+                            category, "", "",
+                            elem.get("sourceName")
+                        ])
+                        sleep_count += 1
+                elem.clear()
+
+            # Drop finished top-level elements so the tree never grows
+            if depth == 1:
+                root.clear()
+
+    os.replace(hr_tmp, hr_path)
+    os.replace(sleep_tmp, sleep_path)
+    print(f"✅ Wrote {hr_count} heart-rate samples to {hr_path} and {sleep_count} sleep intervals to {sleep_path}")
+    return hr_count, sleep_count
+
+def run_aggregation(hr_path, sleep_path, checkpoint_path=None, output_path=None):
+    """
+    Feeds the freshly parsed CSVs into 1c_aggregate_apple's incremental ingestion.
+    An export holds the full history and the CSVs were rewritten, so the old
+    checkpoint is discarded first: the Apple rows are rebuilt from scratch and the
+    new checkpoint lets later appends be ingested incrementally.
+    """
+    spec = importlib.util.spec_from_file_location("aggregate_apple", os.path.join(os.path.dirname(os.path.abspath(__file__)), "1c_aggregate_apple.py"))
+    aggregate_apple = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(aggregate_apple)
+    aggregate_apple.apple_hr_path = hr_path
+    aggregate_apple.apple_sleep_path = sleep_path
+    if checkpoint_path:
+        aggregate_apple.checkpoint_path = checkpoint_path
+    if output_path:
+        aggregate_apple.output_path = output_path
+    if os.path.exists(aggregate_apple.checkpoint_path):
+        os.remove(aggregate_apple.checkpoint_path)
+    aggregate_apple.process_apple_data_incremental()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream an Apple Health export.xml into the applewatchhrv CSVs")
+    parser.add_argument("--export", default=export_path, help="Path to export.xml")
+    parser.add_argument("--hr-out", default=apple_hr_path)
+    parser.add_argument("--sleep-out", default=apple_sleep_path)
+    parser.add_argument("--aggregate", action="store_true", help="Rebuild the Apple rows with 1c_aggregate_apple afterwards (resets its checkpoint)")
+    args = parser.parse_args()
+
+    parse_export(args.export, args.hr_out, args.sleep_out)
+    if args.aggregate:
+        run_aggregation(args.hr_out, args.sleep_out)
@@ -1,12 +1,92 @@
 import pandas as pd
 import numpy as np
+import argparse
+import hashlib
+import io
+import json
 import os
 from datetime import datetime
 
+from sumero_core.pilot_labels import APPLE_RULES, label_health_states
+from sumero_core.storage import load_pilot, pilot_path, save_pilot
+
 # Paths
 apple_hr_path = "applewatchhrv/heart_rate_data.csv"
 apple_sleep_path = "applewatchhrv/sleep_data.csv"
-output_path = "pilot_clean.csv"
+output_path = None # None: pilot_path() when the stage runs
+checkpoint_path = "applewatchhrv/.ingest_checkpoint.json"
+APPLE_SOURCE = "AppleWatch-Raw"
+
+# Sleep stage -> daily column
+STAGE_COLUMNS = {
+    'Deep': 'Deep_Sleep',
+    'REM': 'REM_Sleep',
+    'Light/Core': 'Light_Sleep',
+    'Core': 'Light_Sleep'
+}
+
+def aggregate_sleep(sleep_df):
+    """Daily Total/Deep/REM/Light sleep hours as one (night x stage) pivot."""
+    start = pd.to_datetime(sleep_df['Start Time'])
+    duration = (pd.to_datetime(sleep_df['End Time']) - start).dt.total_seconds() / 3600
+    date = start.dt.date.rename('Date')
+    stage = sleep_df['Category'].map(STAGE_COLUMNS).fillna('Other_Sleep').rename('Stage')
+
+    stages = duration.groupby([date, stage]).sum().unstack(fill_value=0.0)
+    daily_sleep = stages.reindex(columns=['Deep_Sleep', 'REM_Sleep', 'Light_Sleep'], fill_value=0.0)
+    daily_sleep.insert(0, 'Total_Sleep', duration.groupby(date).sum())
+    return daily_sleep.reset_index()
+
+def calculate_quality(daily_sleep):
+    """
+    Quality of Sleep (0-10 scale), vectorized.
+    Target: 20% REM, 20% Deep as "Perfect"; 50% recovery sleep = 10/10, floor of 4.
+    """
+    total = daily_sleep['Total_Sleep'].to_numpy()
+    recovery_sleep = (daily_sleep['Deep_Sleep'] + daily_sleep['REM_Sleep']).to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        quality = np.maximum(recovery_sleep / total * 20, 4)
+    # One value per night: Python's round() keeps results identical to the per-row version
+    quality = np.minimum([round(q, 1) for q in quality], 10)
+    return np.where(total == 0, 5, quality)
+
+def resting_heart_rate(hr_df):
+    """Resting HR: avg between 12 AM and 6 AM, per day."""
+    timestamps = pd.to_datetime(hr_df['Timestamp'])
+    night = (timestamps.dt.hour <= 6).to_numpy()
+    night_ts = timestamps[night]
+    resting_hr = hr_df['Heart Rate'][night].groupby(night_ts.dt.normalize().to_numpy()).mean()
+    resting_hr.index = resting_hr.index.date
+    return resting_hr.rename_axis('Date').rename('Heart Rate').reset_index()
+
+def build_pilot_rows(final_apple):
+    """Maps merged daily metrics to the unified pilot schema, column-wise."""
+    total_sleep = np.array([round(t, 1) for t in final_apple['Total_Sleep']])
+    hr = final_apple['Heart Rate'].to_numpy().astype(int)
+    
+    # Heuristic for Stress (inverted relationship with sleep and HR)
+    stress = np.where(total_sleep < 6, 7, np.where(hr < 65, 4, 5))
+    
+    # Health State Logic
+    state = label_health_states(APPLE_RULES, sleep=total_sleep, stress=stress)
+    
+    n = len(final_apple)
+    return pd.DataFrame({
+        "Gender": ["Male"] * n, # Default for this subject
+        "Age": 30,
+        "Occupation": "Engineer",
+        "Sleep Duration": total_sleep,
+        "Quality of Sleep": final_apple['Quality of Sleep'].to_numpy().astype(int),
+        "Physical Activity Level": 60,
+        "Stress Level": stress,
+        "BMI Category": "Normal",
+        "Blood Pressure": "120/80",
+        "Heart Rate": hr,
+        "Daily Steps": 8000,
+        "Sleep Disorder": "None",
+        "health_state": state,
+        "Source": APPLE_SOURCE
+    })
 
 def process_apple_data():
     print("🚀 Starting Apple Watch Data Aggregation...")
@@ -15,94 +95,171 @@ def process_apple_data():
     hr_df = pd.read_csv(apple_hr_path)
     sleep_df = pd.read_csv(apple_sleep_path)
     
-    # 2. Process Sleep Data
-    sleep_df['Start Time'] = pd.to_datetime(sleep_df['Start Time'])
-    sleep_df['End Time'] = pd.to_datetime(sleep_df['End Time'])
-    sleep_df['Duration'] = (sleep_df['End Time'] - sleep_df['Start Time']).dt.total_seconds() / 3600
-    sleep_df['Date'] = sleep_df['Start Time'].dt.date
-    
-    # Aggregating daily sleep
-    daily_sleep = sleep_df.groupby('Date').agg(
-        Total_Sleep=('Duration', 'sum'),
-        Deep_Sleep=('Duration', lambda x: x[sleep_df.loc[x.index, 'Category'] == 'Deep'].sum()),
-        REM_Sleep=('Duration', lambda x: x[sleep_df.loc[x.index, 'Category'] == 'REM'].sum()),
-        Light_Sleep=('Duration', lambda x: x[sleep_df.loc[x.index, 'Category'].isin(['Light/Core', 'Core'])].sum())
-    ).reset_index()
-    
-    # Calculate Quality of Sleep (0-10 scale)
-    # Target: 20% REM, 20% Deep as "Perfect"
-    def calculate_quality(row):
-        total = row['Total_Sleep']
-        if total == 0: return 5
-        recovery_sleep = row['Deep_Sleep'] + row['REM_Sleep']
-        quality = (recovery_sleep / total) * 20 # 50% recovery sleep = 10/10
-        return min(round(max(quality, 4), 1), 10)
-
-    daily_sleep['Quality of Sleep'] = daily_sleep.apply(calculate_quality, axis=1)
+    # 2. Process Sleep Data (single stage x night pivot)
+    daily_sleep = aggregate_sleep(sleep_df)
+    daily_sleep['Quality of Sleep'] = calculate_quality(daily_sleep)
     
     # 3. Process Heart Rate Data
-    hr_df['Timestamp'] = pd.to_datetime(hr_df['Timestamp'])
-    hr_df['Date'] = hr_df['Timestamp'].dt.date
-    hr_df['Hour'] = hr_df['Timestamp'].dt.hour
-    
-    # Calculate Resting HR (avg between 12 AM and 6 AM)
-    resting_hr = hr_df[(hr_df['Hour'] >= 0) & (hr_df['Hour'] <= 6)].groupby('Date')['Heart Rate'].mean().reset_index()
-    resting_hr.columns = ['Date', 'Heart Rate']
+    resting_hr = resting_heart_rate(hr_df)
     
     # 4. Merge
     final_apple = pd.merge(daily_sleep, resting_hr, on='Date', how='inner')
     
     # 5. Map to Unified Schema
     # Gender, Age, Occupation, Sleep Duration, Quality of Sleep, Physical Activity Level, Stress Level, BMI Category, Blood Pressure, Heart Rate, Daily Steps, Sleep Disorder, health_state
+    apple_processed_df = build_pilot_rows(final_apple)
     
-    pilot_rows = []
-    for _, row in final_apple.iterrows():
-        total_sleep = round(row['Total_Sleep'], 1)
-        hr = int(row['Heart Rate'])
-        
-        # Heuristic for Stress (inverted relationship with sleep and HR)
-        stress = 7 if total_sleep < 6 else (4 if hr < 65 else 5)
-        
-        # Health State Logic
-        if total_sleep < 6 or stress > 7:
-            state = "Under-Recovered"
-        elif total_sleep > 7.5 and stress < 5:
-            state = "Optimal"
-        else:
-            state = "Balanced"
-            
-        pilot_rows.append({
-            "Gender": "Male", # Default for this subject
-            "Age": 30,
-            "Occupation": "Engineer",
-            "Sleep Duration": total_sleep,
-            "Quality of Sleep": int(row['Quality of Sleep']),
-            "Physical Activity Level": 60,
-            "Stress Level": stress,
-            "BMI Category": "Normal",
-            "Blood Pressure": "120/80",
-            "Heart Rate": hr,
-            "Daily Steps": 8000,
-            "Sleep Disorder": "None",
-            "health_state": state,
-            "Source": "AppleWatch-Raw"
-        })
-    
-    apple_processed_df = pd.DataFrame(pilot_rows)
-    
-    # 6. Append to existing pilot_clean.csv
-    if os.path.exists(output_path):
-        existing_df = pd.read_csv(output_path)
+    # 6. Upsert into pilot_clean.csv
+    upsert_apple_rows(apple_processed_df)
+
+def upsert_apple_rows(apple_processed_df):
+    """Replaces the Apple Watch rows in pilot_clean.csv (one per night) instead of appending duplicates."""
+    pilot = output_path or pilot_path()
+    if os.path.exists(pilot):
+        existing_df = load_pilot(pilot)
         # Ensure Source column exists in existing
         if 'Source' not in existing_df.columns:
             existing_df['Source'] = "WHOOP-Study"
         
-        combined_df = pd.concat([existing_df, apple_processed_df], ignore_index=True)
-        combined_df.to_csv(output_path, index=False)
-        print(f"✅ Success! Appended {len(apple_processed_df)} Apple Watch rows to {output_path}")
+        kept_df = existing_df[existing_df['Source'] != APPLE_SOURCE]
+        combined_df = pd.concat([kept_df, apple_processed_df], ignore_index=True)
+        save_pilot(combined_df, pilot)
+        print(f"✅ Success! Upserted {len(apple_processed_df)} Apple Watch rows into {pilot} "
+              f"(replaced {len(existing_df) - len(kept_df)}).")
     else:
-        apple_processed_df.to_csv(output_path, index=False)
-        print(f"✅ Created {output_path} with {len(apple_processed_df)} Apple Watch rows.")
+        save_pilot(apple_processed_df, pilot)
+        print(f"✅ Created {pilot} with {len(apple_processed_df)} Apple Watch rows.")
+
+# --- Incremental Ingestion ---
+# The checkpoint keeps, per source file, the byte offset and last timestamp already
+# ingested, plus mergeable per-night partial sums. A daily sync only parses the
+# bytes appended since the last run.
+
+# Bytes hashed at the start and just before the offset to recognise the same file on resume
+FINGERPRINT_BYTES = 64 * 1024
+
+def load_checkpoint():
+    if os.path.exists(checkpoint_path):
+        with open(checkpoint_path) as f:
+            return json.load(f)
+    return {"sources": {}, "daily": {}}
+
+def save_checkpoint(checkpoint):
+    tmp_path = checkpoint_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, checkpoint_path)
+
+def consumed_fingerprint(f, data_start, offset):
+    """Hashes of the first and the last FINGERPRINT_BYTES already ingested (header excluded)."""
+    head_end = min(offset, data_start + FINGERPRINT_BYTES)
+    tail_start = max(data_start, offset - FINGERPRINT_BYTES)
+    f.seek(data_start)
+    head = hashlib.sha256(f.read(head_end - data_start)).hexdigest()
+    f.seek(tail_start)
+    tail = hashlib.sha256(f.read(offset - tail_start)).hexdigest()
+    return f"{head}:{tail}"
+
+def read_new_records(path, source_state, time_column):
+    """
+    Returns (new_records_df, updated_source_state).
+    Reads only complete lines past the stored offset when the file still starts with
+    the bytes already ingested (same header, same fingerprint of the consumed start
+    and end). A replaced, rewritten or truncated file is reread in full, keeping only
+    rows newer than the timestamp watermark.
+    """
+    with open(path, "rb") as f:
+        header = f.readline()
+        size = os.fstat(f.fileno()).st_size
+        offset = source_state.get("offset", 0)
+        resumed = (
+            source_state.get("header") == header.decode("utf-8")
+            and len(header) <= offset <= size
+            and source_state.get("fingerprint") == consumed_fingerprint(f, len(header), offset)
+        )
+        f.seek(offset if resumed else len(header))
+        data = f.read(size - f.tell())
+
+        # Leave a trailing partial line (file still being written) for the next run
+        data = data[:data.rfind(b"\n") + 1]
+        new_offset = (offset if resumed else len(header)) + len(data)
+        fingerprint = consumed_fingerprint(f, len(header), new_offset)
+    records = pd.read_csv(io.BytesIO(header + data))
+
+    watermark = source_state.get("watermark")
+    if not resumed and watermark:
+        records = records[records[time_column] > watermark]
+
+    new_state = {
+        "header": header.decode("utf-8"),
+        "offset": new_offset,
+        "fingerprint": fingerprint,
+        "watermark": max(filter(None, [watermark, records[time_column].max() if len(records) else None]), default=None)
+    }
+    return records, new_state
+
+def heart_rate_sums(hr_df):
+    """Per-day (sum, count) of night-time HR samples; mergeable across runs."""
+    timestamps = pd.to_datetime(hr_df['Timestamp'])
+    night = (timestamps.dt.hour <= 6).to_numpy()
+    sums = hr_df['Heart Rate'][night].groupby(timestamps[night].dt.normalize().to_numpy()).agg(['sum', 'count'])
+    sums.index = sums.index.date
+    return sums
+
+def merge_daily(daily, frame, columns):
+    """Adds per-date partial sums from frame into the checkpoint's daily dict."""
+    for date, values in zip(frame.index, frame[list(columns)].to_numpy()):
+        day = daily.setdefault(str(date), {})
+        for column, value in zip(columns, values):
+            day[column] = day.get(column, 0.0) + float(value)
+
+def rows_from_checkpoint(daily):
+    """Rebuilds the Apple pilot rows (sorted by night) from accumulated daily sums."""
+    daily_df = pd.DataFrame.from_dict(daily, orient="index").sort_index()
+    for column in ['Total_Sleep', 'Deep_Sleep', 'REM_Sleep', 'Light_Sleep', 'hr_sum', 'hr_count']:
+        if column not in daily_df.columns:
+            daily_df[column] = 0.0
+    daily_df = daily_df[(daily_df['hr_count'] > 0) & daily_df['Total_Sleep'].notna()].copy()
+    daily_df['Heart Rate'] = daily_df['hr_sum'] / daily_df['hr_count']
+    daily_df['Quality of Sleep'] = calculate_quality(daily_df)
+    return build_pilot_rows(daily_df)
+
+def process_apple_data_incremental():
+    print("🚀 Starting incremental Apple Watch ingestion...")
+    checkpoint = load_checkpoint()
+    sources = checkpoint["sources"]
+    daily = checkpoint["daily"]
+
+    sleep_df, sources["sleep"] = read_new_records(apple_sleep_path, sources.get("sleep", {}), 'Start Time')
+    hr_df, sources["heart_rate"] = read_new_records(apple_hr_path, sources.get("heart_rate", {}), 'Timestamp')
+    print(f"New records: {len(sleep_df)} sleep intervals, {len(hr_df)} heart-rate samples")
+
+    if len(sleep_df):
+        merge_daily(daily, aggregate_sleep(sleep_df).set_index('Date'), ['Total_Sleep', 'Deep_Sleep', 'REM_Sleep', 'Light_Sleep'])
+    if len(hr_df):
+        sums = heart_rate_sums(hr_df).rename(columns={'sum': 'hr_sum', 'count': 'hr_count'})
+        merge_daily(daily, sums, ['hr_sum', 'hr_count'])
+
+    if len(sleep_df) or len(hr_df) or not os.path.exists(output_path or pilot_path()):
+        upsert_apple_rows(rows_from_checkpoint(daily))
+    else:
+        print("✅ No new Apple Watch data; pilot_clean.csv left unchanged.")
+
+    # Persist only after pilot_clean.csv is written, so a failed run is retried in full
+    save_checkpoint(checkpoint)
 
 if __name__ == "__main__":
-    process_apple_data()
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Aggregate Apple Watch exports into pilot_clean.csv")
+    parser.add_argument("--incremental", action="store_true", help="Only ingest records added since the last checkpoint")
+    parser.add_argument("--reset", action="store_true", help="Discard the checkpoint before an incremental run")
+    args = parser.parse_args()
+
+    if args.reset and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    if args.incremental:
+        process_apple_data_incremental()
+    else:
+        process_apple_data()
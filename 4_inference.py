@@ -1,69 +1,325 @@
+import argparse
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+
 import torch
-from transformers import AutoModelForCausalLM, AutoTokenizer, BitsAndBytesConfig
+from transformers import AutoModelForCausalLM, AutoTokenizer, BitsAndBytesConfig, DynamicCache, TextIteratorStreamer
 from peft import PeftModel
-import os
 
 # 1. Configuration
 model_id = "unsloth/Llama-3.2-1B-Instruct"
 adapter_dir = "./lora_adapter"
+default_instruction = "Analyze my health data and provide insights."
+prompt_header = "<|begin_of_text|><|start_header_id|>user<|end_header_id|>\n\n"
 
-def run_inference(prompt_text):
-    # Check if adapter exists
-    if not os.path.exists(adapter_dir):
-        print(f"Warning: Adapter not found at {adapter_dir}. Running base model instead.")
-        model = AutoModelForCausalLM.from_pretrained(model_id, torch_dtype=torch.float16, device_map="auto")
-    else:
-        # Load Quantized Base Model
-        bnb_config = BitsAndBytesConfig(
-            load_in_4bit=True,
-            bnb_4bit_quant_type="nf4",
-            bnb_4bit_compute_dtype=torch.float16,
-        )
-        base_model = AutoModelForCausalLM.from_pretrained(
-            model_id,
-            quantization_config=bnb_config,
-            device_map="auto"
-        )
-        # Load Adapter
-        model = PeftModel.from_pretrained(base_model, adapter_dir)
-
-    tokenizer = AutoTokenizer.from_pretrained(model_id)
-    
-    # Format input
-    full_prompt = (
-        f"<|begin_of_text|><|start_header_id|>user<|end_header_id|>\n\n"
-        f"Analyze my health data and provide insights.\n\n"
+def format_prompt(instruction: str, prompt_text: str) -> str:
+    """The user turn exactly as 3_train_lora.py formats it, ending where the answer starts."""
+    return (
+        f"{prompt_header}"
+        f"{instruction}\n\n"
         f"{prompt_text}<|eot_id|><|start_header_id|>assistant<|end_header_id|>\n\n"
     )
 
-    inputs = tokenizer(full_prompt, return_tensors="pt").to(model.device)
-    
-    with torch.no_grad():
-        outputs = model.generate(
-            **inputs,
-            max_new_tokens=256,
-            do_sample=True,
-            temperature=0.7,
-            top_p=0.9,
-            eos_token_id=tokenizer.eos_token_id
-        )
-
-    response = tokenizer.decode(outputs[0][inputs["input_ids"].shape[1]:], skip_special_tokens=True)
-    return response
+def prompt_prefixes(instruction: str) -> tuple:
+    """Shared leading text of every prompt for an instruction, longest first."""
+    return (f"{prompt_header}{instruction}\n\n", prompt_header)
+
+class PrefixCache:
+    """
+    LRU of key/value caches for prompt prefixes, keyed by token ids. Memory grows with
+    cached tokens (layers x heads x head_dim per token), so the bound is a token budget.
+    """
+    def __init__(self, max_tokens: int = 2048):
+        self.max_tokens = max_tokens
+        self.tokens = 0
+        self._entries = OrderedDict() # token id tuple -> KV cache
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.reused_tokens = 0
+
+    def get(self, ids: tuple):
+        kv = self._entries.get(ids)
+        if kv is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(ids)
+        self.hits += 1
+        self.reused_tokens += len(ids)
+        return kv
+
+    def put(self, ids: tuple, kv):
+        if len(ids) > self.max_tokens or ids in self._entries:
+            return
+        self._entries[ids] = kv
+        self.tokens += len(ids)
+        while self.tokens > self.max_tokens:
+            evicted, _ = self._entries.popitem(last=False)
+            self.tokens -= len(evicted)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "tokens": self.tokens, "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "reused_tokens": self.reused_tokens}
+
+class InferenceSession:
+    """
+    Loads the tokenizer, base model and LoRA adapter once and keeps them for every query.
+
+    merge_adapter=True folds the adapter into fp16 base weights (merge_and_unload), which
+    removes the per-layer adapter matmuls at generation time; otherwise the adapter runs
+    on top of the 4-bit base as in training. device="cpu" (or "auto" without CUDA) skips
+    bitsandbytes: fp32 base, adapter always merged, then int8 dynamic quantization of the
+    Linear layers unless quantize=False, on `threads` intra-op threads.
+
+    generate() batches prompts with left padding (decoder-only models continue from the
+    right edge) and groups prompts of similar length so little compute is spent on pad
+    tokens. Single prompts (stream(), batch_size=1) instead reuse the prefilled KV cache of
+    the chat header and of header + instruction from a PrefixCache of prefix_cache_tokens
+    tokens (0 disables it), so prefill only runs over the new text. Calls are serialized
+    by a lock, so one session can be shared across threads (e.g. Streamlit sessions).
+    """
+    def __init__(self, model_id: str = model_id, adapter_dir: str = adapter_dir, merge_adapter: bool = False,
+                 device: str = "auto", quantize: bool = True, threads: int = None, prefix_cache_tokens: int = 2048):
+        start = time.perf_counter()
+        self.model_id = model_id
+        self.adapter_dir = adapter_dir
+        self.has_adapter = os.path.exists(adapter_dir)
+        self.merged = False
+        self.quantized = False
+        if device == "auto":
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.device = device
+        self.last_stats = None
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_id)
+        self.tokenizer.padding_side = "left"
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+
+        if device == "cpu":
+            model = self._load_cpu(quantize, threads)
+        elif not self.has_adapter:
+            print(f"Warning: Adapter not found at {adapter_dir}. Running base model instead.")
+            model = AutoModelForCausalLM.from_pretrained(model_id, torch_dtype=torch.float16, device_map="auto")
+        elif merge_adapter:
+            # 4-bit weights cannot absorb the adapter; merge into an fp16 copy of the base
+            base_model = AutoModelForCausalLM.from_pretrained(model_id, torch_dtype=torch.float16, device_map="auto")
+            model = PeftModel.from_pretrained(base_model, adapter_dir).merge_and_unload()
+            self.merged = True
+        else:
+            # Load Quantized Base Model
+            bnb_config = BitsAndBytesConfig(
+                load_in_4bit=True,
+                bnb_4bit_quant_type="nf4",
+                bnb_4bit_compute_dtype=torch.float16,
+            )
+            base_model = AutoModelForCausalLM.from_pretrained(
+                model_id,
+                quantization_config=bnb_config,
+                device_map="auto"
+            )
+            # Load Adapter
+            model = PeftModel.from_pretrained(base_model, adapter_dir)
+
+        self.model = model.eval()
+        self.prefix_cache = PrefixCache(prefix_cache_tokens) if prefix_cache_tokens else None
+        self._lock = threading.Lock()
+        self.load_seconds = time.perf_counter() - start
+
+    def _load_cpu(self, quantize: bool, threads: int):
+        if threads:
+            torch.set_num_threads(threads)
+        # fp32 weights: CPU kernels for fp16 matmuls are slow or missing
+        model = AutoModelForCausalLM.from_pretrained(self.model_id, torch_dtype=torch.float32)
+        if self.has_adapter:
+            model = PeftModel.from_pretrained(model, self.adapter_dir).merge_and_unload()
+            self.merged = True
+        else:
+            print(f"Warning: Adapter not found at {self.adapter_dir}. Running base model instead.")
+        if quantize:
+            # int8 weights, activations quantized on the fly: ~4x smaller Linear layers, faster matmuls
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+            self.quantized = True
+        return model
+
+    @property
+    def name(self) -> str:
+        suffix = ("+merged-lora" if self.merged else "+lora") if self.has_adapter else ""
+        if self.quantized:
+            suffix += "+int8"
+        return f"{self.model_id}{suffix} ({self.device})"
+
+    def _generation_kwargs(self, max_new_tokens, do_sample, temperature, top_p) -> dict:
+        kwargs = {
+            "max_new_tokens": max_new_tokens,
+            "do_sample": do_sample,
+            "eos_token_id": self.tokenizer.eos_token_id,
+            "pad_token_id": self.tokenizer.pad_token_id,
+        }
+        if do_sample:
+            kwargs.update(temperature=temperature, top_p=top_p)
+        return kwargs
+
+    def generate(self, prompts, instruction: str = default_instruction, batch_size: int = 8, max_new_tokens: int = 256,
+                 do_sample: bool = True, temperature: float = 0.7, top_p: float = 0.9) -> list:
+        """Responses for many prompt texts, in input order."""
+        texts = [format_prompt(instruction, prompt) for prompt in prompts]
+        lengths = [len(ids) for ids in self.tokenizer(texts)["input_ids"]]
+        order = sorted(range(len(texts)), key=lengths.__getitem__)
+        kwargs = self._generation_kwargs(max_new_tokens, do_sample, temperature, top_p)
+
+        responses = [None] * len(texts)
+        new_tokens = 0
+        started = time.perf_counter()
+        with self._lock, torch.no_grad():
+            for start in range(0, len(order), batch_size):
+                batch = order[start:start + batch_size]
+                if len(batch) == 1:
+                    inputs = self._single_inputs(texts[batch[0]], instruction)
+                else:
+                    inputs = self.tokenizer([texts[i] for i in batch], return_tensors="pt", padding=True).to(self.model.device)
+                outputs = self.model.generate(**inputs, **kwargs)
+                # With left padding every prompt ends at the same column
+                generated = outputs[:, inputs["input_ids"].shape[1]:]
+                new_tokens += int((generated != self.tokenizer.pad_token_id).sum())
+                for i, response in zip(batch, self.tokenizer.batch_decode(generated, skip_special_tokens=True)):
+                    responses[i] = response
+        self._record_stats(new_tokens, time.perf_counter() - started)
+        return responses
+
+    def _single_inputs(self, text: str, instruction: str) -> dict:
+        """generate() kwargs for one prompt, starting from a cached prefix KV when there is one."""
+        ids = self.tokenizer(text)["input_ids"]
+        input_ids = torch.tensor([ids], device=self.model.device)
+        inputs = {"input_ids": input_ids, "attention_mask": torch.ones_like(input_ids)}
+        if self.prefix_cache is not None:
+            kv = self._prefix_kv(tuple(ids), prompt_prefixes(instruction))
+            if kv is not None:
+                inputs["past_key_values"] = kv # generate only prefills the tokens after it
+        return inputs
+
+    def _prefix_kv(self, ids: tuple, prefixes: tuple):
+        """
+        A private copy of the KV cache for the longest of `prefixes` that ids starts with
+        (compared as tokens, so a merge across the boundary is not reused). A missing
+        prefix is prefilled on top of the next shorter one and cached.
+        """
+        for n, prefix in enumerate(prefixes):
+            prefix_ids = tuple(self.tokenizer(prefix)["input_ids"])
+            # generate needs at least one uncached token
+            if len(prefix_ids) < len(ids) and ids[:len(prefix_ids)] == prefix_ids:
+                break
+        else:
+            return None
+
+        kv = self.prefix_cache.get(prefix_ids)
+        if kv is None:
+            kv = self._prefix_kv(prefix_ids, prefixes[n + 1:])
+            if kv is None:
+                kv = DynamicCache()
+            cached = kv.get_seq_length()
+            outputs = self.model(input_ids=torch.tensor([prefix_ids[cached:]], device=self.model.device),
+                                 past_key_values=kv, use_cache=True)
+            kv = outputs.past_key_values
+            self.prefix_cache.put(prefix_ids, kv)
+        # generate() appends to the cache it is given; the cached entry must stay untouched
+        return copy.deepcopy(kv)
+
+    def _record_stats(self, new_tokens: int, seconds: float):
+        self.last_stats = {
+            "new_tokens": new_tokens,
+            "seconds": seconds,
+            "tokens_per_second": new_tokens / seconds if seconds else 0.0,
+        }
+
+    def stream(self, prompt_text: str, instruction: str = default_instruction, max_new_tokens: int = 256,
+               do_sample: bool = True, temperature: float = 0.7, top_p: float = 0.9):
+        """Yields text for one prompt as it is generated."""
+        streamer = TextIteratorStreamer(self.tokenizer, skip_prompt=True, skip_special_tokens=True)
+        kwargs = self._generation_kwargs(max_new_tokens, do_sample, temperature, top_p)
+        kwargs["streamer"] = streamer
+
+        errors = []
+        pieces = []
+        started = time.perf_counter()
+
+        def run():
+            try:
+                with self._lock, torch.no_grad():
+                    inputs = self._single_inputs(format_prompt(instruction, prompt_text), instruction)
+                    self.model.generate(**inputs, **kwargs)
+            except Exception as e:
+                errors.append(e)
+                streamer.end() # unblock the reader
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        for text in streamer:
+            if text:
+                pieces.append(text)
+                yield text
+        thread.join()
+        if errors:
+            raise errors[0]
+        seconds = time.perf_counter() - started
+        self._record_stats(len(self.tokenizer("".join(pieces), add_special_tokens=False)["input_ids"]), seconds)
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session(**kwargs) -> InferenceSession:
+    """The process-wide session, loaded on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = InferenceSession(**kwargs)
+    return _session
+
+def run_inference(prompt_text):
+    return get_session().generate([prompt_text])[0]
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the fine-tuned health model on sample prompts")
+    parser.add_argument("--run", action="store_true", help="Load the model and generate (requires torch/transformers/peft)")
+    parser.add_argument("--merge", action="store_true", help="Merge the LoRA adapter into the base weights (always on for CPU)")
+    parser.add_argument("--device", choices=["auto", "cpu", "cuda"], default="auto", help="cpu skips bitsandbytes (no GPU needed)")
+    parser.add_argument("--threads", type=int, default=None, help="CPU threads for torch (default: torch's choice)")
+    parser.add_argument("--no-quantize", action="store_true", help="Keep fp32 weights on CPU instead of int8 dynamic quantization")
+    parser.add_argument("--repeat", type=int, default=1, help="Generate the test cases this many times (benchmarking)")
+    parser.add_argument("--prefix-cache-tokens", type=int, default=2048, help="Token budget of the prompt-prefix KV cache (0 disables)")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--max-new-tokens", type=int, default=256)
+    args = parser.parse_args()
+
     # Example manual tests from the prompt
     test_cases = [
         "Why is my recovery low? (Sleep: 5.8h, Heart Rate: 78, Stress: 8)",
         "What should I do today? (Sleep: 8h, Stress: 3, Activity: 75)",
         "Is this dangerous? (Heart Rate: 85, Sleep: 4h)"
     ]
-    
+
     print("\n--- Running AI Health Platform Inference ---")
-    for tc in test_cases:
-        print(f"\nUser Query: {tc}")
-        # Note: In the real app, we extract variables and format them as the model expects
-        # Here we just pass the text for demonstration
-        print(f"AI Response: [SIMULATED - requires model loading]\n")
-        # To actually run, uncomment below (requires GPU/Deps)
-        # print(f"AI Response:\n{run_inference(tc)}\n")
+    if not args.run:
+        for tc in test_cases:
+            print(f"\nUser Query: {tc}")
+            # Note: In the real app, we extract variables and format them as the model expects
+            # Here we just pass the text for demonstration
+            print(f"AI Response: [SIMULATED - requires model loading]\n")
+        print("To actually run, pass --run (add --device cpu on machines without a GPU)")
+    else:
+        session = get_session(merge_adapter=args.merge, device=args.device, quantize=not args.no_quantize, threads=args.threads,
+                              prefix_cache_tokens=args.prefix_cache_tokens)
+        print(f"Loaded {session.name} in {session.load_seconds:.1f}s ({torch.get_num_threads()} CPU threads)")
+        for _ in range(args.repeat):
+            responses = session.generate(test_cases, batch_size=args.batch_size, max_new_tokens=args.max_new_tokens)
+            stats = session.last_stats
+            print(f"Generated {stats['new_tokens']} tokens for {len(responses)} prompts in {stats['seconds']:.1f}s "
+                  f"({stats['tokens_per_second']:.1f} tokens/sec)")
+        if session.prefix_cache is not None:
+            print(f"Prefix cache: {session.prefix_cache.stats()}")
+        for tc, response in zip(test_cases, responses):
+            print(f"\nUser Query: {tc}\nAI Response:\n{response}\n")
@@ -0,0 +1,119 @@
+"""
+Offline evaluation: replays pilot_instructions.jsonl against an Ollama-compatible
+/api/chat endpoint (the same one HybridBackend.generate_ollama uses) and scores the
+answers against the heuristic outputs. Requests run concurrently with retries, and
+results are checkpointed so an interrupted run resumes where it stopped.
+
+    python 5_evaluate.py --model sumero-lora --concurrency 16
+    python 5_evaluate.py --stub --stub-latency 0.05 --limit 1000   # harness smoke test
+"""
+import argparse
+import json
+import os
+import time
+
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+from sumero_core.evaluation import Checkpoint, StubOllamaServer, evaluate, load_instructions, summarize, user_prompt
+
+instructions_path = "pilot_instructions.jsonl"
+results_dir = "build"
+
+def ollama_asker(url: str, model: str, timeout, pool_size: int):
+    """ask(item) -> answer over one keep-alive session with a connection per concurrent request."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    def ask(item):
+        res = session.post(f"{url}/api/chat", json={
+            "model": model,
+            "messages": [{"role": "user", "content": user_prompt(item)}],
+            "stream": False
+        }, timeout=timeout)
+        res.raise_for_status()
+        body = res.json()
+        if 'error' in body:
+            raise RuntimeError(body['error'])
+        return body['message']['content']
+
+    return ask
+
+def print_summary(summary: dict):
+    for name, value in summary.items():
+        if isinstance(value, float):
+            value = f"{value * 1000:.1f} ms" if name.startswith("latency") else f"{value:.3f}"
+        print(f"  {name:<16} {value}")
+
+def run_evaluation(args):
+    items = load_instructions(args.instructions, limit=args.limit)
+    if not items:
+        print(f"No instructions found at {args.instructions}. Run 2_generate_instructions.py first.")
+        return None
+
+    stub = None
+    if args.stub:
+        references = {user_prompt(item): item["output"] for item in items}
+        stub = StubOllamaServer(lambda prompt: references.get(prompt, ""), latency=args.stub_latency).start()
+        url, model = stub.url, stub.model
+    else:
+        url = args.url or os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+        model = args.model or os.getenv("OLLAMA_MODEL", "llama3.2")
+    timeout = (float(os.getenv("OLLAMA_CONNECT_TIMEOUT", 3.05)), args.timeout)
+
+    os.makedirs(results_dir, exist_ok=True)
+    checkpoint_path = args.checkpoint or os.path.join(results_dir, f"eval_{model.replace(':', '_').replace('/', '_')}.jsonl")
+    if args.fresh and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    checkpoint = Checkpoint(checkpoint_path)
+    todo = sum(item not in checkpoint for item in items)
+    print(f"Evaluating {model} at {url}: {len(items)} prompts, {len(items) - todo} already done ({checkpoint_path})")
+
+    def progress(done, record):
+        if done % args.progress_every == 0 or done == todo:
+            print(f"  {done}/{todo} ({time.perf_counter() - start:.1f}s)")
+
+    start = time.perf_counter()
+    try:
+        evaluate(items, ollama_asker(url, model, timeout, args.concurrency), concurrency=args.concurrency,
+                 retries=args.retries, backoff=args.backoff, checkpoint=checkpoint, progress=progress)
+    finally:
+        elapsed = time.perf_counter() - start
+        checkpoint.close()
+        if stub is not None:
+            stub.stop()
+
+    # Throughput is for this session's requests; quality covers every answered prompt
+    summary = summarize(checkpoint.matching(items))
+    if todo:
+        summary["throughput"] = todo / elapsed
+    summary["elapsed"] = elapsed
+    print("\n--- Evaluation Summary ---")
+    print_summary(summary)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(dict(summary, model=model, url=url, concurrency=args.concurrency), f, indent=2)
+        print(f"Summary written to {args.output}")
+    return summary
+
+if __name__ == "__main__":
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Evaluate an Ollama-served model against the heuristic instruction set")
+    parser.add_argument("--instructions", default=instructions_path, help="Instruction JSONL (numbered shards are picked up too)")
+    parser.add_argument("--url", default=None, help="Ollama base URL (default: OLLAMA_BASE_URL)")
+    parser.add_argument("--model", default=None, help="Model tag (default: OLLAMA_MODEL)")
+    parser.add_argument("--limit", type=int, default=None, help="Only the first N prompts")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight")
+    parser.add_argument("--retries", type=int, default=2, help="Retries per prompt after a failure")
+    parser.add_argument("--backoff", type=float, default=0.5, help="First retry delay in seconds (doubles per retry)")
+    parser.add_argument("--timeout", type=float, default=120, help="Read timeout per request in seconds")
+    parser.add_argument("--checkpoint", default=None, help="Results JSONL (default: build/eval_<model>.jsonl)")
+    parser.add_argument("--fresh", action="store_true", help="Discard the checkpoint instead of resuming")
+    parser.add_argument("--output", default=None, help="Write the summary as JSON")
+    parser.add_argument("--progress-every", type=int, default=500, help="Progress line interval")
+    parser.add_argument("--stub", action="store_true", help="Serve the reference answers from a local stub server")
+    parser.add_argument("--stub-latency", type=float, default=0.0, help="Stub server delay per request in seconds")
+    run_evaluation(parser.parse_args())
@@ -0,0 +1,228 @@
+"""
+Sumero benchmark suite.
+
+Times the engine, the simulation rig and the numbered data-pipeline stages on
+synthetic inputs of several sizes (see synthetic_data.py), and records peak traced memory.
+Results go to a JSON file so two commits can be compared:
+
+    python benchmarks/run_benchmarks.py --sizes 1000,100000 --output bench_before.json
+    python benchmarks/run_benchmarks.py --sizes 1000,100000 --compare bench_before.json
+"""
+import argparse
+import importlib.util
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+from sumero_core.engine import run_engine, run_engine_batch
+from sumero_core.phrasing import generate_briefing
+from sumero_core.responder import COMMON_QUESTIONS, HeuristicResponder
+from sumero_core.simulation import run_simulation
+from synthetic_data import generate_population, write_wearable_streams
+
+BENCHMARKS = {}
+
+def benchmark(name: str):
+    """Registers setup(size, workdir) -> zero-arg callable that does the timed work."""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+def load_stage(filename: str):
+    """Imports a numbered pipeline script (e.g. 1_process_data.py) as a module."""
+    path = os.path.join(PROJECT_ROOT, filename)
+    module_name = "stage_" + os.path.splitext(filename)[0].replace("-", "_")
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+# --- Synthetic Inputs ---
+
+def make_population(size: int, seed: int = 0) -> pd.DataFrame:
+    """Rows in the Sleep_health_and_lifestyle_dataset.csv schema."""
+    return next(generate_population(size, seed=seed, chunksize=size))
+
+def make_apple_exports(size: int, workdir: str, seed: int = 0) -> tuple:
+    """About `size` minute-level heart-rate samples (plus matching nights) for one user."""
+    user_dir, = write_wearable_streams(workdir, users=1, days=max(1, size // 1440), seed=seed, hr_interval=60)
+    return os.path.join(user_dir, "heart_rate_data.csv"), os.path.join(user_dir, "sleep_data.csv")
+
+def engine_inputs(population: pd.DataFrame) -> dict:
+    return {
+        "sleep_hours": population["Sleep Duration"].to_numpy(dtype=float),
+        "stress_level": population["Stress Level"].to_numpy(),
+        "resting_hr": population["Heart Rate"].to_numpy(),
+        "blood_pressure": population["Blood Pressure"].to_numpy(dtype=object)
+    }
+
+# --- Benchmarks ---
+
+@benchmark("engine.run_engine")
+def bench_run_engine(size, workdir):
+    inputs = pd.DataFrame(engine_inputs(make_population(size))).to_dict("records")
+    return lambda: [run_engine(row) for row in inputs]
+
+@benchmark("engine.run_engine_batch")
+def bench_run_engine_batch(size, workdir):
+    inputs = engine_inputs(make_population(size))
+    return lambda: run_engine_batch(inputs)
+
+@benchmark("phrasing.generate_briefing")
+def bench_generate_briefing(size, workdir):
+    decisions = run_engine_batch(engine_inputs(make_population(size)))
+    rows = list(zip(decisions["health_state"], decisions["reason_codes"], decisions["workout_allowed"]))
+    return lambda: [generate_briefing(state, codes, workout) for state, codes, workout in rows]
+
+@benchmark("responder.respond_batch")
+def bench_respond_batch(size, workdir):
+    population = make_population(size)
+    population["health_state"] = "Balanced"
+    prompts = [COMMON_QUESTIONS[i % len(COMMON_QUESTIONS)] for i in range(size)]
+    responder = HeuristicResponder(seed=0)
+    return lambda: responder.respond_batch(prompts, population)
+
+@benchmark("simulation.run_simulation")
+def bench_run_simulation(size, workdir):
+    data_path = os.path.join(workdir, "population.csv")
+    make_population(size).to_csv(data_path, index=False)
+    return lambda: run_simulation(data_path)
+
+@benchmark("1_process_data.process_data")
+def bench_process_data(size, workdir):
+    stage = load_stage("1_process_data.py")
+    stage.raw_data_path = os.path.join(workdir, "raw.csv")
+    stage.clean_data_path = os.path.join(workdir, "clean.csv")
+    make_population(size).to_csv(stage.raw_data_path, index=False)
+    return stage.process_data
+
+@benchmark("1c_aggregate_apple.process_apple_data")
+def bench_process_apple_data(size, workdir):
+    stage = load_stage("1c_aggregate_apple.py")
+    stage.apple_hr_path, stage.apple_sleep_path = make_apple_exports(size, workdir)
+    stage.output_path = os.path.join(workdir, "apple_clean.csv")
+
+    def run():
+        # Each run starts from an empty output so appends do not accumulate
+        if os.path.exists(stage.output_path):
+            os.remove(stage.output_path)
+        stage.process_apple_data()
+    return run
+
+@benchmark("2_generate_instructions.generate_instructions")
+def bench_generate_instructions(size, workdir):
+    stage = load_stage("2_generate_instructions.py")
+    stage.clean_data_path = os.path.join(workdir, "clean.csv")
+    stage.instructions_path = os.path.join(workdir, "instructions.jsonl")
+    population = make_population(size).drop(columns=["Person ID"])
+    population["health_state"] = "Balanced"
+    population.to_csv(stage.clean_data_path, index=False)
+    return stage.generate_instructions
+
+# --- Runner ---
+
+def measure(fn, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        with redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+
+    # Memory is measured in a separate run: tracemalloc would distort the timings
+    tracemalloc.start()
+    try:
+        with redirect_stdout(io.StringIO()):
+            fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "seconds_min": min(timings),
+        "seconds_median": statistics.median(timings),
+        "peak_mb": peak / 2**20
+    }
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmarks(sizes: list, names: list, repeat: int) -> dict:
+    results = []
+    for name in names:
+        for size in sizes:
+            with tempfile.TemporaryDirectory() as workdir:
+                fn = BENCHMARKS[name](size, workdir)
+                result = {"name": name, "size": size, **measure(fn, repeat)}
+            results.append(result)
+            print(f"{name:<48} {size:>9,}  {result['seconds_min']:9.4f}s  {result['peak_mb']:9.1f} MB")
+
+    return {
+        "commit": git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "results": results
+    }
+
+def compare(report: dict, baseline: dict, threshold: float) -> list:
+    """Returns (name, size, ratio) for every benchmark slower than threshold x baseline."""
+    baseline_times = {(r["name"], r["size"]): r["seconds_min"] for r in baseline["results"]}
+    regressions = []
+    print(f"\nComparison against {baseline.get('commit')}:")
+    for r in report["results"]:
+        old = baseline_times.get((r["name"], r["size"]))
+        if not old:
+            continue
+        ratio = r["seconds_min"] / old
+        flag = "  REGRESSION" if ratio > threshold else ""
+        print(f"{r['name']:<48} {r['size']:>9,}  x{ratio:6.2f}{flag}")
+        if ratio > threshold:
+            regressions.append((r["name"], r["size"], ratio))
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sumero benchmark suite")
+    parser.add_argument("--sizes", default="1000,100000,1000000", help="Comma-separated synthetic row counts")
+    parser.add_argument("--only", default=None, help="Comma-separated benchmark names (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per benchmark (best is reported)")
+    parser.add_argument("--output", default="bench_results.json", help="Machine-readable results file")
+    parser.add_argument("--compare", default=None, help="Baseline results file to compare against")
+    parser.add_argument("--threshold", type=float, default=1.2, help="Slowdown ratio that counts as a regression")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = set(names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    report = run_benchmarks(sizes, names, args.repeat)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved results to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        if regressions:
+            sys.exit(1)
@@ -0,0 +1,187 @@
+"""
+Seeded synthetic data for load testing.
+
+population: survey rows in the Sleep_health_and_lifestyle_dataset.csv schema,
+            bootstrapped from the real dataset with per-field jitter so the
+            joint distribution (occupation vs. stress, BMI vs. BP, ...) stays realistic.
+streams:    per-user Apple Watch exports in the applewatchhrv formats
+            (heart_rate_data.csv: Timestamp, Heart Rate;
+             sleep_data.csv: Start Time, End Time, Category, Timestamp, Heart Rate, Source Name).
+
+Everything is written chunk by chunk, so output size is bounded by disk, not RAM:
+
+    python benchmarks/synthetic_data.py population --rows 50000000 --out population.csv
+    python benchmarks/synthetic_data.py streams --users 1000 --days 30 --out synthetic_watch/
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SEED_DATASET = os.path.join(PROJECT_ROOT, "Sleep_health_and_lifestyle_dataset.csv")
+SOURCE_NAME = "Apple Watch SE 2020"
+
+# --- Population ---
+
+def load_seed_population(path: str = SEED_DATASET) -> pd.DataFrame:
+    seed_df = pd.read_csv(path)
+    bp = seed_df["Blood Pressure"].str.split("/", expand=True).astype(int)
+    seed_df["_systolic"], seed_df["_diastolic"] = bp[0], bp[1]
+    seed_df["Sleep Disorder"] = seed_df["Sleep Disorder"].fillna("None")
+    return seed_df
+
+def _jitter(rng, values, low, high, lo_clip, hi_clip):
+    return np.clip(values + rng.integers(low, high + 1, len(values)), lo_clip, hi_clip)
+
+def generate_population(rows: int, seed: int = 0, chunksize: int = 1_000_000, seed_df: pd.DataFrame = None):
+    """Yields DataFrame chunks with `rows` synthetic users in total."""
+    if seed_df is None:
+        seed_df = load_seed_population()
+    streams = np.random.SeedSequence(seed).spawn(max(1, -(-rows // chunksize)))
+
+    for chunk_no, start in enumerate(range(0, rows, chunksize)):
+        rng = np.random.default_rng(streams[chunk_no])
+        n = min(chunksize, rows - start)
+        base = seed_df.iloc[rng.integers(0, len(seed_df), n)]
+
+        systolic = _jitter(rng, base["_systolic"].to_numpy(), -4, 4, 90, 180)
+        diastolic = np.minimum(_jitter(rng, base["_diastolic"].to_numpy(), -3, 3, 55, 120), systolic - 20)
+        sleep = np.clip(base["Sleep Duration"].to_numpy() + rng.normal(0, 0.25, n), 3.5, 10.0).round(1)
+
+        yield pd.DataFrame({
+            "Person ID": np.arange(start + 1, start + n + 1),
+            "Gender": base["Gender"].to_numpy(),
+            "Age": _jitter(rng, base["Age"].to_numpy(), -2, 2, 18, 80),
+            "Occupation": base["Occupation"].to_numpy(),
+            "Sleep Duration": sleep,
+            "Quality of Sleep": _jitter(rng, base["Quality of Sleep"].to_numpy(), -1, 1, 1, 10),
+            "Physical Activity Level": _jitter(rng, base["Physical Activity Level"].to_numpy(), -5, 5, 0, 100),
+            "Stress Level": _jitter(rng, base["Stress Level"].to_numpy(), -1, 1, 1, 10),
+            "BMI Category": base["BMI Category"].to_numpy(),
+            "Blood Pressure": pd.Series(systolic).astype(str).to_numpy(dtype=object) + "/" + pd.Series(diastolic).astype(str).to_numpy(dtype=object),
+            "Heart Rate": _jitter(rng, base["Heart Rate"].to_numpy(), -2, 2, 45, 110),
+            "Daily Steps": _jitter(rng, base["Daily Steps"].to_numpy(), -500, 500, 1000, 20000) // 100 * 100,
+            "Sleep Disorder": base["Sleep Disorder"].to_numpy()
+        })
+
+def write_population(path: str, rows: int, seed: int = 0, chunksize: int = 1_000_000) -> int:
+    written = 0
+    for chunk in generate_population(rows, seed=seed, chunksize=chunksize):
+        chunk.to_csv(path, mode="w" if written == 0 else "a", header=written == 0, index=False)
+        written += len(chunk)
+    return written
+
+# --- Wearable Streams ---
+
+def _timestamps(day: np.datetime64, seconds: np.ndarray) -> np.ndarray:
+    stamps = np.datetime_as_string(day + seconds.astype("timedelta64[s]"), unit="s")
+    return np.char.replace(stamps, "T", " ")
+
+def _night_stages(rng, sleep_hours: float) -> list:
+    """(category, minutes) intervals for one night of ~sleep_hours asleep, in 90-min cycles."""
+    stages, asleep, cycle = [], 0.0, 0
+    target = sleep_hours * 60
+    while asleep < target:
+        early = cycle < 2
+        for category, low, high in (
+            ("Light/Core", 8, 25),
+            ("Deep", 10 if early else 0, 30 if early else 8),
+            ("Light/Core", 4, 15),
+            ("REM", 5 if early else 15, 12 if early else 35),
+        ):
+            minutes = round(rng.uniform(low, high) * 2) / 2
+            if minutes > 0:
+                stages.append((category, minutes))
+                asleep += minutes
+        if rng.random() < 0.35:
+            stages.append(("Awake", round(rng.uniform(0.5, 8) * 2) / 2))
+        cycle += 1
+    return stages
+
+def generate_user_day(rng, day: np.datetime64, resting_hr: int, sleep_hours: float, hr_interval: int = 1) -> tuple:
+    """One day of (heart_rate_df, sleep_df) for a user; the night starts shortly after midnight."""
+    onset = int(rng.integers(20, 100)) * 60 + int(rng.integers(0, 60))
+
+    # Sleep-stage intervals
+    stages = _night_stages(rng, sleep_hours)
+    minutes = np.array([m for _, m in stages])
+    starts = onset + np.concatenate([[0], np.cumsum(minutes[:-1])]) * 60
+    ends = starts + minutes * 60
+    wake = int(ends[-1])
+    sleep_df = pd.DataFrame({
+        "Start Time": _timestamps(day, starts.astype(np.int64)),
+        "End Time": _timestamps(day, ends.astype(np.int64)),
+        "Category": [category for category, _ in stages],
+        "Timestamp": _timestamps(day, np.maximum(starts - rng.integers(0, 90, len(stages)), 0).astype(np.int64)),
+        "Heart Rate": resting_hr - 6 + rng.integers(-3, 4, len(stages)),
+        "Source Name": SOURCE_NAME
+    })
+
+    # Heart rate: lower while asleep, higher while awake, a couple of workouts, smoothed noise
+    seconds = np.arange(0, 86400, hr_interval)
+    asleep = (seconds >= onset) & (seconds < wake)
+    level = np.where(asleep, resting_hr - 6, resting_hr + 12).astype(float)
+    for _ in range(int(rng.integers(0, 3))):
+        start = int(rng.integers(wake, 79200))
+        level[(seconds >= start) & (seconds < start + int(rng.integers(1800, 3600)))] += 45
+    window = max(1, 60 // hr_interval)
+    noise = np.convolve(rng.normal(0, 4, len(seconds)), np.ones(window) / np.sqrt(window), mode="same")
+    hr_df = pd.DataFrame({
+        "Timestamp": _timestamps(day, seconds),
+        "Heart Rate": np.clip(level + noise, 40, 200).round().astype(int)
+    })
+    return hr_df, sleep_df
+
+def write_wearable_streams(out_dir: str, users: int, days: int, seed: int = 0,
+                           start_date: str = "2022-09-13", hr_interval: int = 1) -> list:
+    """Writes out_dir/user_NNNNNN/{heart_rate_data,sleep_data}.csv; one user-day in memory at a time."""
+    profiles = next(generate_population(users, seed=seed, chunksize=max(users, 1)))
+    user_seeds = np.random.SeedSequence(seed).spawn(users + 1)[1:]
+    first_day = np.datetime64(start_date, "s")
+    user_dirs = []
+
+    profile_rows = zip(profiles["Sleep Duration"].to_numpy(), profiles["Heart Rate"].to_numpy(), user_seeds)
+    for user_no, (sleep_duration, resting_hr, user_seed) in enumerate(profile_rows):
+        rng = np.random.default_rng(user_seed)
+        user_dir = os.path.join(out_dir, f"user_{user_no + 1:06d}")
+        os.makedirs(user_dir, exist_ok=True)
+        hr_path = os.path.join(user_dir, "heart_rate_data.csv")
+        sleep_path = os.path.join(user_dir, "sleep_data.csv")
+
+        for day_no in range(days):
+            sleep_hours = max(3.0, sleep_duration + rng.normal(0, 0.6))
+            hr_df, sleep_df = generate_user_day(rng, first_day + np.timedelta64(day_no, "D"), int(resting_hr), sleep_hours, hr_interval)
+            hr_df.to_csv(hr_path, mode="w" if day_no == 0 else "a", header=day_no == 0, index=False)
+            sleep_df.to_csv(sleep_path, mode="w" if day_no == 0 else "a", header=day_no == 0, index=False)
+        user_dirs.append(user_dir)
+
+    return user_dirs
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Seeded synthetic data for Sumero load tests")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    pop = sub.add_parser("population", help="Survey rows in the Sleep Health dataset schema")
+    pop.add_argument("--rows", type=int, required=True)
+    pop.add_argument("--out", required=True)
+    pop.add_argument("--seed", type=int, default=0)
+    pop.add_argument("--chunksize", type=int, default=1_000_000)
+
+    streams = sub.add_parser("streams", help="Per-user Apple Watch heart-rate and sleep-stage exports")
+    streams.add_argument("--users", type=int, required=True)
+    streams.add_argument("--days", type=int, required=True)
+    streams.add_argument("--out", required=True)
+    streams.add_argument("--seed", type=int, default=0)
+    streams.add_argument("--start-date", default="2022-09-13")
+    streams.add_argument("--hr-interval", type=int, default=1, help="Seconds between heart-rate samples")
+
+    args = parser.parse_args()
+    if args.command == "population":
+        rows = write_population(args.out, args.rows, seed=args.seed, chunksize=args.chunksize)
+        print(f"Wrote {rows:,} synthetic users to {args.out}")
+    else:
+        user_dirs = write_wearable_streams(args.out, args.users, args.days, seed=args.seed,
+                                           start_date=args.start_date, hr_interval=args.hr_interval)
+        print(f"Wrote {args.days} days of wearable streams for {len(user_dirs)} users under {args.out}")
@@ -0,0 +1,266 @@
+"""
+Hybrid LLM backend for the dashboard: the deterministic heuristic responder plus
+Ollama (local) and OpenAI (cloud). Importable without Streamlit.
+"""
+import importlib.util
+import json
+import os
+import threading
+
+import httpx
+import requests
+from openai import OpenAI
+from requests.adapters import HTTPAdapter
+
+from sumero_core.responder import HeuristicResponder
+from sumero_core.resilience import CircuitBreaker, DeadlineExceeded, stream_with_deadline
+from sumero_core.response_cache import ResponseCache, cache_key
+
+class _Failure(str):
+    """Text yielded in place of model output (errors, heuristic fallbacks); never cached."""
+
+LABELS = {"ollama": "Ollama", "openai": "OpenAI", "lora": "The fine-tuned model"}
+INFERENCE_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "4_inference.py")
+
+def _timeout(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+class HybridBackend:
+    """
+    Holds long-lived, keep-alive clients: one pooled requests.Session for Ollama and one
+    OpenAI client, so TCP/TLS setup is paid once per process instead of once per message.
+    """
+    def __init__(self):
+        self.openai_key = os.getenv("OPENAI_API_KEY")
+        self.ollama_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+        self.ollama_model = os.getenv("OLLAMA_MODEL", "llama3.2")
+        self.openai_model = "gpt-4o"
+        self.responder = HeuristicResponder()
+
+        # Repeated questions about the same patient context skip the model entirely
+        self.cache = ResponseCache(
+            max_entries=int(os.getenv("SUMERO_CACHE_SIZE", 1024)),
+            ttl=float(os.getenv("SUMERO_CACHE_TTL", 3600)),
+            db_path=os.getenv("SUMERO_CACHE_DB") or None
+        )
+
+        # (connect, read) timeouts; read bounds the gap between streamed chunks
+        self.ollama_timeout = (_timeout("OLLAMA_CONNECT_TIMEOUT", 3.05), _timeout("OLLAMA_READ_TIMEOUT", 15))
+        self.openai_timeout = httpx.Timeout(_timeout("OPENAI_READ_TIMEOUT", 30), connect=_timeout("OPENAI_CONNECT_TIMEOUT", 5))
+
+        self.session = requests.Session()
+        pool_size = int(os.getenv("SUMERO_HTTP_POOL_SIZE", 10))
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._openai_client = None
+
+        # Fine-tuned model (4_inference.InferenceSession): loaded once, on first use
+        self.lora_adapter = os.getenv("SUMERO_LORA_ADAPTER", "./lora_adapter")
+        self.lora_merge = os.getenv("SUMERO_LORA_MERGE", "0") == "1"
+        self.lora_device = os.getenv("SUMERO_LORA_DEVICE", "auto")
+        self.lora_quantize = os.getenv("SUMERO_LORA_QUANTIZE", "1") == "1"
+        self.lora_threads = int(os.getenv("SUMERO_TORCH_THREADS", 0)) or None
+        self.lora_prefix_cache_tokens = int(os.getenv("SUMERO_PREFIX_CACHE_TOKENS", 2048))
+        self._lora_session = None
+        self._lora_lock = threading.Lock()
+
+        # Latency budget per LLM request; repeated failures trip a breaker and route to the heuristic engine
+        self.first_token_deadline = _timeout("SUMERO_LLM_FIRST_TOKEN_DEADLINE", 4)
+        self.total_deadline = _timeout("SUMERO_LLM_DEADLINE", 30)
+        failure_threshold = int(os.getenv("SUMERO_BREAKER_FAILURES", 3))
+        probe_interval = _timeout("SUMERO_BREAKER_PROBE_INTERVAL", 10)
+        self.breakers = {
+            "ollama": CircuitBreaker(failure_threshold, probe_interval, probe=lambda: self.ollama_models() is not None),
+            "openai": CircuitBreaker(failure_threshold, probe_interval, probe=self._openai_reachable),
+            "lora": CircuitBreaker(failure_threshold, probe_interval), # no cheap probe: half-open trials
+        }
+
+    @property
+    def openai_client(self):
+        """Created on first use and reused for every request."""
+        if self._openai_client is None:
+            self._openai_client = OpenAI(api_key=self.openai_key, timeout=self.openai_timeout)
+        return self._openai_client
+
+    def _openai_reachable(self) -> bool:
+        if not self.openai_key:
+            return False
+        self.openai_client.models.list()
+        return True
+
+    def lora_session(self):
+        """The InferenceSession from 4_inference.py, loaded on the first call (needs torch/transformers/peft)."""
+        with self._lora_lock:
+            if self._lora_session is None:
+                spec = importlib.util.spec_from_file_location("sumero_inference", INFERENCE_SCRIPT)
+                module = importlib.util.module_from_spec(spec)
+                spec.loader.exec_module(module)
+                self._lora_session = module.InferenceSession(
+                    adapter_dir=self.lora_adapter, merge_adapter=self.lora_merge,
+                    device=self.lora_device, quantize=self.lora_quantize, threads=self.lora_threads,
+                    prefix_cache_tokens=self.lora_prefix_cache_tokens
+                )
+        return self._lora_session
+
+    def ollama_models(self):
+        """Model tags served by Ollama, or None when it is unreachable."""
+        try:
+            res = self.session.get(f"{self.ollama_url}/api/tags", timeout=self.ollama_timeout)
+            return [m['name'] for m in res.json().get('models', [])]
+        except (requests.exceptions.RequestException, ValueError):
+            return None
+
+    def get_context(self, data):
+        """Converts patient data into a markdown table for the LLM."""
+        return f"""
+### PATIENT CONTEXT (CURRENT STATE)
+| Metric | Value |
+| :--- | :--- |
+| **Occupation** | {data['Occupation']} |
+| **Age** | {data['Age']} |
+| **Health State** | {data['health_state']} |
+| **Stress Level** | {data['Stress Level']}/10 |
+| **Sleep Duration** | {data['Sleep Duration']}h |
+| **Recovery Deep/REM** | {data.get('Deep_Sleep', 'N/A')}h / {data.get('REM_Sleep', 'N/A')}h |
+| **Heart Rate** | {data['Heart Rate']} bpm |
+| **Steps Today** | {data['Daily Steps']} |
+"""
+
+    def _cached(self, backend, model, prompt, data, tokens):
+        """Serves a cached answer, or streams a fresh one and stores it if it completed without error."""
+        key = cache_key(backend, model, self.get_context(data), prompt)
+        cached = self.cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+
+        parts = []
+        for token in self._routed(backend, tokens, prompt, data):
+            yield token
+            if isinstance(token, _Failure):
+                return
+            parts.append(token)
+        if parts:
+            self.cache.set(key, "".join(parts))
+
+    def _fallback(self, backend, prompt, data, reason):
+        return _Failure(f"_({LABELS[backend]} {reason}; answering from the heuristic engine.)_\n\n{self.generate_heuristic(prompt, data)}")
+
+    def _error_fallback(self, error, prompt, data):
+        return _Failure(f"{error}\n\n_(Answering from the heuristic engine.)_\n\n{self.generate_heuristic(prompt, data)}")
+
+    def _routed(self, backend, tokens, prompt, data):
+        """
+        Latency-budgeted call: the first token must arrive within first_token_deadline and the
+        answer within total_deadline. Errors and missed deadlines count against the backend's
+        circuit breaker; while it is open the heuristic answer is returned without waiting.
+        """
+        breaker = self.breakers[backend]
+        if not breaker.allow():
+            yield self._fallback(backend, prompt, data, "is unavailable")
+            return
+
+        streamed = False
+        try:
+            for token in stream_with_deadline(tokens(prompt, data), self.first_token_deadline, self.total_deadline):
+                if isinstance(token, _Failure):
+                    breaker.record_failure()
+                    yield token if streamed else self._error_fallback(token, prompt, data)
+                    return
+                streamed = True
+                yield token
+        except DeadlineExceeded:
+            breaker.record_failure()
+            yield _Failure(" …") if streamed else self._fallback(backend, prompt, data, "is too slow")
+            return
+        breaker.record_success()
+
+    def generate_heuristic(self, prompt, data):
+        """Production-Grade Heuristic Engine - Edge-Optimized Intelligence (sumero_core/responder.py)"""
+        return self.responder.respond(prompt, data)
+
+    def generate_ollama(self, prompt, data):
+        """Local Ollama Inference with better error handling."""
+        return "".join(self.stream_ollama(prompt, data))
+
+    def stream_ollama(self, prompt, data):
+        """Yields Ollama tokens as they arrive (NDJSON chunks from /api/chat); cached answers come back whole."""
+        return self._cached("ollama", self.ollama_model, prompt, data, self._ollama_tokens)
+
+    def _ollama_tokens(self, prompt, data):
+        sys_prompt = f"You are Sumero Health AI, a proactive health coach. Use this patient context to give a 1-2 sentence directive answer:\n{self.get_context(data)}"
+        try:
+            with self.session.post(f"{self.ollama_url}/api/chat", 
+                json={
+                    "model": self.ollama_model,
+                    "messages": [
+                        {"role": "system", "content": sys_prompt},
+                        {"role": "user", "content": prompt}
+                    ],
+                    "stream": True
+                }, timeout=self.ollama_timeout, stream=True) as res:
+
+                for line in res.iter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if 'error' in chunk:
+                        yield _Failure(f"⚠️ Ollama Error: {chunk['error']}. (Try: 'ollama pull {self.ollama_model}')")
+                        return
+                    if 'message' in chunk:
+                        yield chunk['message'].get('content', '')
+                    else:
+                        yield _Failure(f"⚠️ Unexpected Ollama Response: {chunk}")
+                        return
+                    if chunk.get('done'):
+                        return
+            
+        except requests.exceptions.ConnectionError:
+            yield _Failure(f"⚠️ Connection Error: Could not reach Ollama at {self.ollama_url}. Is it running?")
+        except Exception as e:
+            yield _Failure(f"⚠️ Ollama Exception: {e}")
+
+    def generate_openai(self, prompt, data):
+        """Cloud OpenAI Inference."""
+        return "".join(self.stream_openai(prompt, data))
+
+    def stream_openai(self, prompt, data):
+        """Yields OpenAI completion deltas as they arrive; cached answers come back whole."""
+        return self._cached("openai", self.openai_model, prompt, data, self._openai_tokens)
+
+    def _openai_tokens(self, prompt, data):
+        if not self.openai_key:
+            yield _Failure("⚠️ OpenAI API key missing in .env")
+            return
+        sys_prompt = f"You are Sumero Health AI. Be proactive and directive. Use context:\n{self.get_context(data)}"
+        try:
+            stream = self.openai_client.chat.completions.create(
+                model=self.openai_model,
+                messages=[
+                    {"role": "system", "content": sys_prompt},
+                    {"role": "user", "content": prompt}
+                ],
+                stream=True
+            )
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            yield _Failure(f"⚠️ OpenAI Error: {e}")
+
+    def generate_lora(self, prompt, data):
+        """Local fine-tuned model (LoRA adapter from 3_train_lora.py)."""
+        return "".join(self.stream_lora(prompt, data))
+
+    def stream_lora(self, prompt, data):
+        """Yields the fine-tuned model's text as it is generated; cached answers come back whole."""
+        return self._cached("lora", self.lora_adapter, prompt, data, self._lora_tokens)
+
+    def _lora_tokens(self, prompt, data):
+        # Same layout as the training inputs: the question, then one "column: value" line per field
+        profile = "\n".join(f"{column}: {value}" for column, value in data.items())
+        try:
+            yield from self.lora_session().stream(profile, instruction=prompt)
+        except Exception as e:
+            yield _Failure(f"⚠️ Local Model Error: {e}")
@@ -0,0 +1,272 @@
+"""
+Sumero data pipeline runner.
+
+Declares each numbered stage with its inputs, outputs and code, and skips a stage
+when the content hash of all three is unchanged since its last successful run.
+Stages whose dependencies are met run in parallel (WHOOP and Apple preprocessing).
+
+    python pipeline.py                  # run what changed
+    python pipeline.py --dry-run        # show what would run
+    python pipeline.py --force          # rerun everything
+    python pipeline.py --with-training  # also run 3_train_lora.py (GPU)
+"""
+import argparse
+import ast
+import hashlib
+import importlib.util
+import json
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(PROJECT_ROOT)
+
+from sumero_core.storage import load_pilot, pilot_path, save_pilot
+
+BUILD_DIR = "build"
+CACHE_PATH = os.path.join(BUILD_DIR, ".pipeline_cache.json")
+WHOOP_CLEAN = os.path.join(BUILD_DIR, "whoop_clean.csv")
+APPLE_CLEAN = os.path.join(BUILD_DIR, "apple_clean.csv")
+APPLE_HR = "applewatchhrv/heart_rate_data.csv"
+APPLE_SLEEP = "applewatchhrv/sleep_data.csv"
+INSTRUCTIONS = "pilot_instructions.jsonl"
+APPLE_SOURCE = "AppleWatch-Raw"
+CORE_PACKAGE = "sumero_core"
+
+def merge_sources(whoop_path: str = WHOOP_CLEAN, apple_path: str = APPLE_CLEAN, out_path: str = None):
+    """
+    Unified pilot dataset: WHOOP survey rows followed by Apple Watch nights (same as running 1 then 1c).
+    Without a fresh Apple export, the Apple rows already in out_path (default: pilot_path()) are carried over.
+    """
+    out_path = out_path or pilot_path()
+    combined_df = load_pilot(whoop_path)
+    if 'Source' not in combined_df.columns:
+        combined_df['Source'] = "WHOOP-Study"
+    apple_df = None
+    if os.path.exists(apple_path):
+        apple_df = load_pilot(apple_path)
+    elif os.path.exists(out_path):
+        previous_df = load_pilot(out_path)
+        if 'Source' in previous_df.columns:
+            apple_df = previous_df[previous_df['Source'] == APPLE_SOURCE].copy()
+            # CSV readers turn the literal "None" that 1c writes into NaN
+            apple_df['Sleep Disorder'] = apple_df['Sleep Disorder'].astype(object).fillna("None")
+    if apple_df is not None and len(apple_df):
+        combined_df = pd.concat([combined_df, apple_df], ignore_index=True)
+    save_pilot(combined_df, out_path)
+    print(f"Merged {len(combined_df)} rows into {out_path}")
+
+# Each stage runs `function` from `script` after overriding the script's module-level paths.
+# The sumero_core modules its `code` imports are added by stage_code(), so they need not be listed.
+def pipeline_stages(pilot: str = None) -> list:
+    """The stage table for a pilot dataset path (default: pilot_path(), read at call time)."""
+    pilot = pilot or pilot_path()
+    return [
+        {
+            "name": "whoop",
+            "script": "1_process_data.py", "function": "process_data",
+            "overrides": {"raw_data_path": "Sleep_health_and_lifestyle_dataset.csv", "clean_data_path": WHOOP_CLEAN},
+            "inputs": ["Sleep_health_and_lifestyle_dataset.csv"],
+            "outputs": [WHOOP_CLEAN],
+            "code": ["1_process_data.py"],
+        },
+        {
+            "name": "apple",
+            "script": "1c_aggregate_apple.py", "function": "process_apple_data",
+            "overrides": {"apple_hr_path": APPLE_HR, "apple_sleep_path": APPLE_SLEEP, "output_path": APPLE_CLEAN},
+            "inputs": [APPLE_HR, APPLE_SLEEP],
+            "outputs": [APPLE_CLEAN],
+            "code": ["1c_aggregate_apple.py"],
+            "optional": True, # skipped (not failed) when no Apple export is present
+        },
+        {
+            "name": "merge",
+            "script": "pipeline.py", "function": "merge_sources",
+            "overrides": {},
+            "inputs": [WHOOP_CLEAN, APPLE_CLEAN, pilot],
+            "outputs": [pilot],
+            "code": ["pipeline.py"],
+            "after": ["whoop", "apple"],
+        },
+        {
+            "name": "instructions",
+            "script": "2_generate_instructions.py", "function": "generate_instructions",
+            "overrides": {"clean_data_path": pilot, "instructions_path": INSTRUCTIONS},
+            "inputs": [pilot],
+            "outputs": [INSTRUCTIONS],
+            "code": ["2_generate_instructions.py"],
+            "after": ["merge"],
+        },
+        {
+            "name": "train",
+            "script": "3_train_lora.py", "function": "train",
+            "overrides": {"data_path": INSTRUCTIONS, "output_dir": "./lora_adapter"},
+            "inputs": [INSTRUCTIONS],
+            "outputs": ["lora_adapter"],
+            "code": ["3_train_lora.py"],
+            "after": ["instructions"],
+            "opt_in": True,
+        },
+    ]
+
+def file_digest(path: str) -> str:
+    if not os.path.exists(path):
+        return "missing"
+    if os.path.isdir(path):
+        return "dir"
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(1 << 20):
+            digest.update(block)
+    return digest.hexdigest()
+
+def module_path(module: str):
+    """Repo-relative file of a dotted module name, or None when it is not part of the repo."""
+    base = module.replace(".", "/")
+    for path in (base + ".py", base + "/__init__.py"):
+        if os.path.isfile(os.path.join(PROJECT_ROOT, path)):
+            return path
+    return None
+
+def imported_modules(path: str) -> list:
+    """Dotted names of the sumero_core modules imported anywhere in a file, relative imports resolved."""
+    with open(os.path.join(PROJECT_ROOT, path)) as f:
+        tree = ast.parse(f.read(), path)
+    package = os.path.dirname(path).replace("/", ".").split(".")
+    modules = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            parent = package[:len(package) - node.level + 1] if node.level else []
+            base = ".".join(parent + ([node.module] if node.module else []))
+            # `from sumero_core import storage` names a module, `from .storage import x` does not
+            modules += [base] + [f"{base}.{alias.name}" for alias in node.names]
+    return [m for m in modules if m == CORE_PACKAGE or m.startswith(CORE_PACKAGE + ".")]
+
+def code_dependencies(path: str) -> list:
+    """The file plus every sumero_core module it imports, followed transitively."""
+    seen, todo = set(), [path]
+    while todo:
+        path = todo.pop()
+        if path in seen:
+            continue
+        seen.add(path)
+        if path.endswith(".py") and os.path.isfile(os.path.join(PROJECT_ROOT, path)):
+            todo += [dep for dep in map(module_path, imported_modules(path)) if dep]
+    return sorted(seen)
+
+def stage_code(stage: dict) -> list:
+    """A stage's declared code files and the sumero_core modules they import."""
+    return sorted(set().union(*(code_dependencies(path) for path in stage["code"])))
+
+def stage_hash(stage: dict) -> str:
+    """Content hash of a stage's code, inputs and settings."""
+    digest = hashlib.sha256(json.dumps(stage["overrides"], sort_keys=True).encode())
+    for path in stage_code(stage) + stage["inputs"]:
+        digest.update(f"{path}:{file_digest(os.path.join(PROJECT_ROOT, path))}".encode())
+    return digest.hexdigest()
+
+def run_stage(script: str, function: str, overrides: dict):
+    """Worker entry point: import the numbered script as a module and call its stage function."""
+    os.chdir(PROJECT_ROOT)
+    spec = importlib.util.spec_from_file_location(f"stage_{os.path.splitext(script)[0]}", os.path.join(PROJECT_ROOT, script))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    for name, value in overrides.items():
+        setattr(module, name, value)
+    getattr(module, function)()
+
+def load_cache() -> dict:
+    if os.path.exists(CACHE_PATH):
+        with open(CACHE_PATH) as f:
+            return json.load(f)
+    return {}
+
+def save_cache(cache: dict):
+    with open(CACHE_PATH, "w") as f:
+        json.dump(cache, f, indent=1, sort_keys=True)
+
+def run_pipeline(selected: list = None, force: bool = False, workers: int = 2, dry_run: bool = False, with_training: bool = False) -> dict:
+    """Runs stale stages in dependency order; returns {stage: 'ran' | 'cached' | 'skipped' | 'stale' | 'failed'}."""
+    os.chdir(PROJECT_ROOT)
+    os.makedirs(BUILD_DIR, exist_ok=True)
+    stages = {s["name"]: s for s in pipeline_stages() if (with_training or not s.get("opt_in")) and (not selected or s["name"] in selected)}
+    cache = load_cache()
+    status = {}
+    pending = dict(stages)
+    running = {}
+
+    def ready(stage):
+        return all(status.get(dep) in ("ran", "cached", "skipped", "stale") or dep not in stages for dep in stage.get("after", []))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while pending or running:
+            for name, stage in list(pending.items()):
+                if any(status.get(dep) == "failed" for dep in stage.get("after", [])):
+                    status[name] = "failed"
+                    del pending[name]
+                    print(f"[{name}] not run: an upstream stage failed")
+                    continue
+                if not ready(stage):
+                    continue
+                del pending[name]
+
+                missing = [path for path in stage["inputs"] if not os.path.exists(path) and path not in sum((s["outputs"] for s in stages.values()), [])]
+                if stage.get("optional") and missing:
+                    status[name] = "skipped"
+                    print(f"[{name}] skipped: missing {', '.join(missing)}")
+                    continue
+
+                digest = stage_hash(stage)
+                up_to_date = cache.get(name) == digest and all(os.path.exists(path) for path in stage["outputs"])
+                if up_to_date and not force:
+                    status[name] = "cached"
+                    print(f"[{name}] up to date")
+                elif dry_run:
+                    status[name] = "stale"
+                    print(f"[{name}] would run")
+                else:
+                    print(f"[{name}] running {stage['script']}:{stage['function']}")
+                    running[pool.submit(run_stage, stage["script"], stage["function"], stage["overrides"])] = (name, stage)
+
+            if not running:
+                if pending and not any(ready(stage) for stage in pending.values()):
+                    break
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, stage = running.pop(future)
+                try:
+                    future.result()
+                except Exception as e:
+                    status[name] = "failed"
+                    print(f"[{name}] failed: {e}")
+                    continue
+                status[name] = "ran"
+                # Hash after the run so outputs of upstream stages are included
+                cache[name] = stage_hash(stage)
+                save_cache(cache)
+
+    return status
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv() # before pipeline_stages() reads SUMERO_PILOT_PATH; stage workers inherit the environment
+    parser = argparse.ArgumentParser(description="Run the Sumero data pipeline with content-hash caching")
+    parser.add_argument("--stages", default=None, help="Comma-separated subset of: " + ", ".join(s["name"] for s in pipeline_stages()))
+    parser.add_argument("--force", action="store_true", help="Ignore the cache and rerun selected stages")
+    parser.add_argument("--workers", type=int, default=2, help="Stages to run in parallel")
+    parser.add_argument("--dry-run", action="store_true", help="Only report which stages are stale")
+    parser.add_argument("--with-training", action="store_true", help="Include 3_train_lora.py")
+    args = parser.parse_args()
+
+    result = run_pipeline(args.stages.split(",") if args.stages else None, args.force, args.workers, args.dry_run, args.with_training)
+    print("\nPipeline: " + ", ".join(f"{name}={state}" for name, state in result.items()))
+    if "failed" in result.values():
+        sys.exit(1)
@@ -1,29 +1,26 @@
-from .health_states import determine_health_state
-from .heuristics.recovery import recovery_decisions
-from .heuristics.sleep import sleep_decisions
-from .phrasing import generate_briefing
+import numpy as np
+import pandas as pd
 
-def run_engine(inputs: dict) -> dict:
+from .health_states import determine_health_state, determine_health_state_batch
+from .heuristics.recovery import REASON_COMBOS, recovery_decisions, recovery_decisions_batch
+from .heuristics.sleep import sleep_decisions, sleep_decisions_batch
+from .inputs import EngineInput, split_blood_pressure
+from .phrasing import BRIEFING_TABLE, generate_briefing
+
+def run_engine(inputs) -> dict:
     """
     The Brain: Orchestrates the flow from Input -> State -> Decisions.
     Deterministic. No AI.
+    Accepts an EngineInput record or a raw Input Schema dict.
     """
+    if not isinstance(inputs, EngineInput):
+        inputs = EngineInput.from_dict(inputs)
     
     # 1. Determine Core State
-    state = determine_health_state(
-        sleep_hours=inputs["sleep_hours"],
-        stress_level=inputs["stress_level"],
-        resting_hr=inputs["resting_hr"],
-        bp_str=inputs.get("blood_pressure", "120/80")
-    )
+    state = determine_health_state(inputs)
     
     # 2. Run Heuristic Modules
-    recovery_out = recovery_decisions(
-        health_state=state, 
-        stress_level=inputs["stress_level"],
-        resting_hr=inputs["resting_hr"],
-        bp_str=inputs.get("blood_pressure", "120/80")
-    )
+    recovery_out = recovery_decisions(health_state=state, inputs=inputs)
     sleep_out = sleep_decisions(state)
     
     # 3. Generate Deterministic Briefing
@@ -43,3 +40,62 @@ def run_engine(inputs: dict) -> dict:
     }
     
     return decision
+
+# One BRIEFING_TABLE id per REASON_COMBOS entry (the combo index also fixes state and workout).
+_COMBO_STATES = ("Under_Recovered",) * 8 + ("Sleep_Deprived", "Well_Recovered")
+_COMBO_BRIEFING_IDS = np.array([
+    BRIEFING_TABLE.briefing_id(state=state, reason_codes=codes, workout_allowed=state == "Well_Recovered")
+    for state, codes in zip(_COMBO_STATES, REASON_COMBOS)
+], dtype=np.int16)
+
+def run_engine_batch(inputs, briefing_ids: bool = False) -> pd.DataFrame:
+    """
+    Vectorized run_engine for whole cohorts.
+    Accepts a DataFrame (or dict of column arrays) keyed like the Input Schema:
+    sleep_hours, stress_level, resting_hr and either systolic_bp/diastolic_bp
+    or blood_pressure strings. Returns one decision row per input row.
+
+    Briefings come back as a categorical over BRIEFING_TABLE, or with
+    briefing_ids=True as a small-int 'briefing_id' column instead.
+    """
+    sleep_hours = np.asarray(inputs["sleep_hours"], dtype=float)
+    stress_level = np.asarray(inputs["stress_level"])
+    resting_hr = np.asarray(inputs["resting_hr"])
+
+    if "systolic_bp" in inputs and "diastolic_bp" in inputs:
+        sys_bp = np.asarray(inputs["systolic_bp"])
+        dia_bp = np.asarray(inputs["diastolic_bp"])
+    elif "blood_pressure" in inputs:
+        sys_bp, dia_bp, _ = split_blood_pressure(inputs["blood_pressure"])
+    else:
+        sys_bp = np.full(len(sleep_hours), 120)
+        dia_bp = np.full(len(sleep_hours), 80)
+
+    # 1. Determine Core State
+    state = determine_health_state_batch(sleep_hours, stress_level, resting_hr, sys_bp, dia_bp)
+
+    # 2. Run Heuristic Modules
+    recovery_out = recovery_decisions_batch(state, stress_level, resting_hr, sys_bp, dia_bp)
+    reason_index = recovery_out.pop("reason_index")
+    sleep_out = sleep_decisions_batch(state)
+
+    # 3. Look Up Deterministic Briefings
+    ids = _COMBO_BRIEFING_IDS[reason_index]
+    if briefing_ids:
+        briefing = {"briefing_id": ids}
+    else:
+        briefing = {"briefing": pd.Categorical.from_codes(ids, categories=BRIEFING_TABLE.briefings)}
+
+    # 4. Construct Decision Columns
+    decisions = pd.DataFrame({
+        "health_state": state,
+        **recovery_out,
+        **sleep_out,
+        **briefing,
+        "hydration_target_liters": np.where(state == "Unknown", 2.5, 3.0)
+    })
+
+    if isinstance(inputs, pd.DataFrame):
+        decisions.index = inputs.index
+
+    return decisions
@@ -0,0 +1,292 @@
+import asyncio
+import glob
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .response_cache import normalize_prompt
+from .stats import percentile
+
+# --- Instruction Set ---
+
+def instruction_files(path: str) -> list:
+    """path itself, or its numbered shards (pilot_instructions-00000-of-00004.jsonl, ...)."""
+    if os.path.exists(path):
+        return [path]
+    stem, ext = os.path.splitext(path)
+    return sorted(glob.glob(f"{glob.escape(stem)}-[0-9]*-of-[0-9]*{ext}"))
+
+def load_instructions(path: str, limit: int = None) -> list:
+    """[{"id", "instruction", "input", "output"}, ...] in file order; ids are line numbers across shards."""
+    items = []
+    for file in instruction_files(path):
+        with open(file) as f:
+            for line in f:
+                if limit is not None and len(items) >= limit:
+                    return items
+                if line.strip():
+                    items.append(dict(json.loads(line), id=len(items)))
+    return items
+
+def item_digest(item: dict) -> str:
+    """Hash of an item's instruction, input and reference output; ids alone do not survive a regeneration."""
+    payload = json.dumps([item["instruction"], item["input"], item["output"]])
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+def user_prompt(item: dict) -> str:
+    """The user turn the adapter is trained on (see 3_train_lora.py)."""
+    return f"{item['instruction']}\n\n{item['input']}"
+
+# --- Agreement ---
+
+_TOKEN = re.compile(r"[a-z0-9:.]+")
+_KEY_FACT = re.compile(r"\*\*(.+?)\*\*")
+
+def _tokens(text: str) -> list:
+    return [t.strip(".") for t in _TOKEN.findall(text.lower()) if t.strip(".")]
+
+def token_f1(answer: str, reference: str) -> float:
+    """Bag-of-words F1 between an answer and the heuristic reference."""
+    answer_tokens, reference_tokens = _tokens(answer), _tokens(reference)
+    if not answer_tokens or not reference_tokens:
+        return float(answer_tokens == reference_tokens)
+    counts = {}
+    for t in reference_tokens:
+        counts[t] = counts.get(t, 0) + 1
+    common = 0
+    for t in answer_tokens:
+        if counts.get(t, 0) > 0:
+            counts[t] -= 1
+            common += 1
+    if common == 0:
+        return 0.0
+    precision, recall = common / len(answer_tokens), common / len(reference_tokens)
+    return 2 * precision * recall / (precision + recall)
+
+def key_fact_recall(answer: str, reference: str):
+    """Share of the reference's bold directives (times, hours, targets) that the answer repeats; None if it has none."""
+    facts = _KEY_FACT.findall(reference)
+    if not facts:
+        return None
+    answer = answer.lower()
+    return sum(fact.lower() in answer for fact in facts) / len(facts)
+
+def agreement(answer: str, reference: str) -> dict:
+    return {
+        "exact": normalize_prompt(answer) == normalize_prompt(reference),
+        "token_f1": token_f1(answer, reference),
+        "key_fact_recall": key_fact_recall(answer, reference),
+    }
+
+# --- Checkpoint ---
+
+class Checkpoint:
+    """
+    Append-only JSONL of finished results, keyed by the item_digest each was scored
+    against; the line id is kept only to order the output. Reopening the same file
+    resumes: items already answered are skipped, items that failed are asked again, and a
+    reordered or regenerated instruction set reuses the answers to unchanged items. Each
+    line is flushed as it is written, so an interrupted run loses at most the requests
+    that were in flight.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.results = {}
+        torn = False
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    torn = not line.endswith("\n")
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue # torn final line from an interrupted run
+                    if "digest" in record: # records from before digests cannot be matched to an item
+                        self.results[record["digest"]] = record
+        self._file = open(path, "a")
+        if torn:
+            self._file.write("\n") # so the next record does not extend the torn line
+
+    def __contains__(self, item) -> bool:
+        record = self.results.get(item_digest(item))
+        return record is not None and record["error"] is None
+
+    def matching(self, items) -> list:
+        """Records for these items in item order (answered or failed), ids renumbered to the current lines."""
+        records = []
+        for item in items:
+            record = self.results.get(item_digest(item))
+            if record is not None:
+                records.append(dict(record, id=item["id"]))
+        return records
+
+    def write(self, record: dict):
+        self.results[record["digest"]] = record
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+# --- Runner ---
+
+async def _ask_with_retries(ask, item, executor, retries: int, backoff: float) -> dict:
+    """Runs the blocking ask(item) on the executor; failed attempts are retried with exponential backoff."""
+    loop = asyncio.get_running_loop()
+    attempt = 0
+    while True:
+        start = time.perf_counter()
+        try:
+            answer = await loop.run_in_executor(executor, ask, item)
+            latency = time.perf_counter() - start
+            return dict(agreement(answer, item["output"]), id=item["id"], digest=item_digest(item), answer=answer,
+                        latency=latency, attempts=attempt + 1, error=None)
+        except Exception as e:
+            if attempt >= retries:
+                return {"id": item["id"], "digest": item_digest(item), "answer": None, "latency": time.perf_counter() - start,
+                        "attempts": attempt + 1, "error": f"{type(e).__name__}: {e}"}
+            await asyncio.sleep(backoff * 2 ** attempt)
+            attempt += 1
+
+async def evaluate_async(items, ask, concurrency: int = 8, retries: int = 2, backoff: float = 0.5, checkpoint: Checkpoint = None, progress=None) -> list:
+    """
+    Replays items through ask(item) -> answer with at most `concurrency` requests in
+    flight. A fixed pool of worker tasks drains a queue, so 30k prompts never become
+    30k pending tasks. Returns the new records (items already in the checkpoint are skipped).
+    """
+    pending = asyncio.Queue()
+    for item in items:
+        if checkpoint is None or item not in checkpoint:
+            pending.put_nowait(item)
+    records = []
+
+    async def worker():
+        while True:
+            try:
+                item = pending.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            record = await _ask_with_retries(ask, item, executor, retries, backoff)
+            records.append(record)
+            if checkpoint is not None:
+                checkpoint.write(record)
+            if progress is not None:
+                progress(len(records), record)
+
+    # One thread per worker, independent of the loop's default executor size
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    try:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    finally:
+        executor.shutdown(wait=False)
+    return records
+
+def evaluate(items, ask, **kwargs) -> list:
+    """Synchronous entry point for evaluate_async."""
+    return asyncio.run(evaluate_async(items, ask, **kwargs))
+
+# --- Metrics ---
+
+def summarize(records, elapsed: float = None) -> dict:
+    """Latency percentiles, throughput, error/retry counts and mean agreement over records."""
+    ok = [r for r in records if r["error"] is None]
+    summary = {
+        "requests": len(records),
+        "succeeded": len(ok),
+        "failed": len(records) - len(ok),
+        "retried": sum(r["attempts"] > 1 for r in records),
+    }
+    if ok:
+        latencies = [r["latency"] for r in ok]
+        summary.update({f"latency_p{q}": percentile(latencies, q) for q in (50, 90, 95, 99)})
+        summary["latency_max"] = max(latencies)
+        summary["exact_match"] = sum(r["exact"] for r in ok) / len(ok)
+        summary["token_f1"] = sum(r["token_f1"] for r in ok) / len(ok)
+        facts = [r["key_fact_recall"] for r in ok if r["key_fact_recall"] is not None]
+        summary["key_fact_recall"] = sum(facts) / len(facts) if facts else None
+    if elapsed:
+        summary["elapsed"] = elapsed
+        summary["throughput"] = len(records) / elapsed
+    return summary
+
+# --- Stub Server ---
+
+class StubOllamaServer:
+    """
+    Local stand-in for Ollama's /api/chat (non-streaming) and /api/tags, for tests and
+    harness smoke runs. answer(user_message) gives the reply; `latency` seconds are slept
+    per request and every `fail_every`-th request returns HTTP 500.
+    """
+    def __init__(self, answer, latency: float = 0.0, fail_every: int = 0, model: str = "stub"):
+        self.answer = answer
+        self.latency = latency
+        self.fail_every = fail_every
+        self.model = model
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1" # keep-alive, like Ollama
+
+            def _send(self, status, payload):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path == "/api/tags":
+                    self._send(200, {"models": [{"name": stub.model}]})
+                else:
+                    self._send(404, {"error": "not found"})
+
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                with stub._lock:
+                    stub.requests += 1
+                    failing = stub.fail_every and stub.requests % stub.fail_every == 0
+                if stub.latency:
+                    time.sleep(stub.latency)
+                if failing:
+                    self._send(500, {"error": "stub failure"})
+                    return
+                user = next((m["content"] for m in reversed(request["messages"]) if m["role"] == "user"), "")
+                self._send(200, {"model": request.get("model"), "message": {"role": "assistant", "content": stub.answer(user)}, "done": True})
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
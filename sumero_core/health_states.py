@@ -1,4 +1,8 @@
-def determine_health_state(sleep_hours: float, stress_level: int, resting_hr: int, bp_str: str = "120/80") -> str:
+import numpy as np
+
+from .inputs import EngineInput
+
+def determine_health_state(inputs: EngineInput) -> str:
     """
     Medical-Grade Calibration: Incorporates Sleep, Stress, HR, and BP.
     
@@ -9,25 +13,41 @@ def determine_health_state(sleep_hours: float, stress_level: int, resting_hr: in
     - BP > 135/88 (Hypertension Proxy) -> "Under_Recovered"
     - Otherwise -> "Well_Recovered"
     """
-    # Parse Blood Pressure
-    try:
-        sys_bp, dia_bp = map(int, bp_str.split('/'))
-    except:
-        sys_bp, dia_bp = 120, 80 # Default fallback
-        
+    sleep_hours = inputs.sleep_hours
+
     if sleep_hours < 6.0:
         return "Sleep_Deprived"
     
     # Check physiological strain markers
     is_strained = (
         sleep_hours < 7.0 or 
-        stress_level >= 7 or 
-        resting_hr > 80 or 
-        sys_bp > 135 or 
-        dia_bp > 88
+        inputs.stress_level >= 7 or 
+        inputs.resting_hr > 80 or 
+        inputs.systolic_bp > 135 or 
+        inputs.diastolic_bp > 88
     )
     
     if is_strained:
         return "Under_Recovered"
     
     return "Well_Recovered"
+
+def determine_health_state_batch(sleep_hours, stress_level, resting_hr, sys_bp, dia_bp) -> np.ndarray:
+    """
+    Column-wise twin of determine_health_state. Same rules, evaluated as NumPy masks.
+    """
+    sleep_hours = np.asarray(sleep_hours, dtype=float)
+
+    is_strained = (
+        (sleep_hours < 7.0) |
+        (np.asarray(stress_level) >= 7) |
+        (np.asarray(resting_hr) > 80) |
+        (np.asarray(sys_bp) > 135) |
+        (np.asarray(dia_bp) > 88)
+    )
+
+    return np.select(
+        [sleep_hours < 6.0, is_strained],
+        ["Sleep_Deprived", "Under_Recovered"],
+        default="Well_Recovered"
+    ).astype(object)
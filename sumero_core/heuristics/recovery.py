@@ -1,15 +1,15 @@
-def recovery_decisions(health_state: str, stress_level: int, resting_hr: int, bp_str: str) -> dict:
+import numpy as np
+
+from ..inputs import EngineInput
+
+def recovery_decisions(health_state: str, inputs: EngineInput) -> dict:
     """
     Decides workout permissions and nap protocols.
     Captures specific physiological reasons for the state.
     """
     reasons = []
-    
-    # Parse BP for reason capturing
-    try:
-        sys_bp, dia_bp = map(int, bp_str.split('/'))
-    except:
-        sys_bp, dia_bp = 120, 80
+    stress_level = inputs.stress_level
+    sys_bp, dia_bp = inputs.systolic_bp, inputs.diastolic_bp
 
     if health_state == "Sleep_Deprived":
         return {
@@ -21,7 +21,7 @@ def recovery_decisions(health_state: str, stress_level: int, resting_hr: int, bp
     
     elif health_state == "Under_Recovered":
         if stress_level >= 7: reasons.append("HIGH_STRESS")
-        if resting_hr > 80: reasons.append("HIGH_HR")
+        if inputs.resting_hr > 80: reasons.append("HIGH_HR")
         if sys_bp > 135 or dia_bp > 88: reasons.append("HIGH_BP")
         if not reasons: reasons.append("LOW_SLEEP") # Fallback
         
@@ -40,3 +40,48 @@ def recovery_decisions(health_state: str, stress_level: int, resting_hr: int, bp
             "priority_focus": "activity",
             "reason_codes": ["GOOD_RECOVERY"]
         }
+
+# Every reason-code list recovery_decisions can emit, indexed for batch mode.
+# 0-7: Under_Recovered, bit 1 = HIGH_STRESS, bit 2 = HIGH_HR, bit 4 = HIGH_BP.
+REASON_COMBOS = (
+    ("LOW_SLEEP",),
+    ("HIGH_STRESS",),
+    ("HIGH_HR",),
+    ("HIGH_STRESS", "HIGH_HR"),
+    ("HIGH_BP",),
+    ("HIGH_STRESS", "HIGH_BP"),
+    ("HIGH_HR", "HIGH_BP"),
+    ("HIGH_STRESS", "HIGH_HR", "HIGH_BP"),
+    ("LOW_SLEEP",),      # 8: Sleep_Deprived
+    ("GOOD_RECOVERY",),  # 9: Well_Recovered
+)
+
+def recovery_decisions_batch(health_state, stress_level, resting_hr, sys_bp, dia_bp) -> dict:
+    """
+    Column-wise twin of recovery_decisions.
+    Returns one array per decision field, plus 'reason_index' into REASON_COMBOS.
+    """
+    health_state = np.asarray(health_state, dtype=object)
+    stress_level = np.asarray(stress_level)
+    sys_bp = np.asarray(sys_bp)
+
+    deprived = health_state == "Sleep_Deprived"
+    under = health_state == "Under_Recovered"
+
+    reason_bits = (
+        (stress_level >= 7).astype(np.int8) |
+        ((np.asarray(resting_hr) > 80).astype(np.int8) << 1) |
+        (((sys_bp > 135) | (np.asarray(dia_bp) > 88)).astype(np.int8) << 2)
+    )
+    reason_index = np.select([deprived, under], [8, reason_bits], default=9).astype(np.int8)
+
+    reason_table = np.empty(len(REASON_COMBOS), dtype=object)
+    reason_table[:] = [list(codes) for codes in REASON_COMBOS]
+
+    return {
+        "workout_allowed": ~(deprived | under),
+        "nap_recommended": deprived | (under & ((stress_level > 5) | (sys_bp > 130))),
+        "priority_focus": np.select([deprived, under], ["sleep", "recovery"], default="activity").astype(object),
+        "reason_codes": reason_table[reason_index],
+        "reason_index": reason_index
+    }
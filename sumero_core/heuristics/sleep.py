@@ -1,3 +1,5 @@
+import numpy as np
+
 def sleep_decisions(health_state: str) -> dict:
     """
     Decides strict bedtimes and work cutoffs based on Health State.
@@ -17,3 +19,15 @@ def sleep_decisions(health_state: str) -> dict:
             "recommended_bedtime": "22:30", # 10:30 PM
             "work_cutoff_time": "19:00"     # 7 PM
         }
+
+def sleep_decisions_batch(health_state) -> dict:
+    """
+    Column-wise twin of sleep_decisions.
+    """
+    health_state = np.asarray(health_state, dtype=object)
+    conditions = [health_state == "Sleep_Deprived", health_state == "Under_Recovered"]
+
+    return {
+        "recommended_bedtime": np.select(conditions, ["21:00", "21:45"], default="22:30").astype(object),
+        "work_cutoff_time": np.select(conditions, ["17:00", "18:00"], default="19:00").astype(object)
+    }
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+DEFAULT_BP = (120, 80)
+
+def parse_blood_pressure(bp_str) -> tuple:
+    """
+    Parses a "Sys/Dia" reading into (systolic, diastolic, valid).
+    Unparseable readings fall back to 120/80 and are flagged with valid=False.
+    """
+    try:
+        sys_bp, dia_bp = map(int, bp_str.split('/'))
+    except (AttributeError, TypeError, ValueError):
+        return DEFAULT_BP[0], DEFAULT_BP[1], False
+    return sys_bp, dia_bp, True
+
+def split_blood_pressure(bp_values) -> tuple:
+    """
+    Vectorized parse_blood_pressure for batch mode.
+    Each distinct reading is parsed once; returns (systolic, diastolic, valid) arrays.
+    """
+    codes, uniques = pd.factorize(np.asarray(bp_values, dtype=object), use_na_sentinel=False)
+    parsed = np.array([parse_blood_pressure(bp_str) for bp_str in uniques], dtype=np.int64).reshape(-1, 3)
+    return parsed[codes, 0], parsed[codes, 1], parsed[codes, 2].astype(bool)
+
+class EngineInput:
+    """
+    Typed engine input record (see inputs_schema.json).
+    Built once per user: BP is pre-split and parse failures are flagged in bp_valid.
+    """
+    __slots__ = (
+        "sleep_hours", "stress_level", "resting_hr",
+        "systolic_bp", "diastolic_bp", "bp_valid",
+        "age", "occupation"
+    )
+
+    def __init__(self, sleep_hours: float, stress_level: int, resting_hr: int,
+                 systolic_bp: int = DEFAULT_BP[0], diastolic_bp: int = DEFAULT_BP[1],
+                 bp_valid: bool = True, age: int = None, occupation: str = None):
+        self.sleep_hours = sleep_hours
+        self.stress_level = stress_level
+        self.resting_hr = resting_hr
+        self.systolic_bp = systolic_bp
+        self.diastolic_bp = diastolic_bp
+        self.bp_valid = bp_valid
+        self.age = age
+        self.occupation = occupation
+
+    @classmethod
+    def from_dict(cls, inputs: dict) -> "EngineInput":
+        systolic_bp, diastolic_bp, bp_valid = parse_blood_pressure(inputs.get("blood_pressure", "120/80"))
+        return cls(
+            sleep_hours=inputs["sleep_hours"],
+            stress_level=inputs["stress_level"],
+            resting_hr=inputs["resting_hr"],
+            systolic_bp=systolic_bp,
+            diastolic_bp=diastolic_bp,
+            bp_valid=bp_valid,
+            age=inputs.get("age"),
+            occupation=inputs.get("occupation")
+        )
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"EngineInput({fields})"
@@ -0,0 +1,102 @@
+import re
+
+# (intent, keywords) in priority order: a text gets the first intent with any keyword
+# as a substring of the lowercased text, otherwise the classifier's default.
+
+# Chat intents for the dashboard's heuristic layer
+HEURISTIC_INTENTS = (
+    ("sleep", ("sleep", "bed", "bedtime", "rest tonight", "when should i sleep")),
+    ("workout", ("workout", "exercise", "gym", "run", "train", "lift")),
+    ("stress", ("stress", "anxious", "overwhelmed", "burnout", "mental")),
+    ("fatigue", ("tired", "exhausted", "drained", "fatigue", "energy", "sleepy")),
+    ("nap", ("nap", "power nap", "short sleep")),
+    ("activity", ("steps", "walk", "activity", "move")),
+    ("work", ("work", "productivity", "focus", "concentration", "stop working")),
+    ("nutrition", ("eat", "food", "nutrition", "drink", "water", "hydrate")),
+    ("heart_rate", ("heart rate", "hr", "pulse", "bpm")),
+    ("recovery", ("recover", "recovery", "health", "state", "status")),
+    ("body", ("weight", "bmi", "body", "fat")),
+    ("age", ("age", "older", "younger", "aging")),
+    ("occupation", ("job", "career")),
+    ("overview", ("how am i", "doing", "status", "overall")),
+)
+
+# Response families for the instruction-tuning dataset (2_generate_instructions.py).
+# "time_query" is refined with TIME_INTENTS.
+INSTRUCTION_INTENTS = (
+    ("time_query", ("when", "time")),
+    ("sleep_quality", ("healthy", "improving", "quality")),
+    ("workout", ("workout", "run", "push", "weights")),
+    ("depleted", ("tired", "exhausted", "stress", "immediate")),
+    ("profile", ("bmi", "weight", "gender")),
+    ("vitals", ("heart", "hrv", "blood")),
+    ("activity", ("steps", "activity")),
+)
+
+TIME_INTENTS = (
+    ("wind_down", ("rest", "stop")),
+    ("bedtime", ("sleep", "bed")),
+    ("nap", ("nap",)),
+)
+
+def _trie_pattern(keywords) -> str:
+    """Regex for a set of literals, factored into a prefix trie (one char test per position)."""
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return "(?:" + body + ")?" if "" in node else body
+
+    return build(trie)
+
+class IntentClassifier:
+    """
+    Keyword intent matcher compiled into one trie-shaped regex inside a lookahead, so a
+    single scan sees the longest keyword starting at every position (overlaps included).
+    Every other keyword matching at that position is a prefix of it, so each keyword
+    carries the best priority among its prefixes; the text's intent is the best overall.
+    """
+    def __init__(self, intents, default: str):
+        self.intents = tuple(intents)
+        self.default = default
+        priority = {}
+        for rank, (_, keywords) in enumerate(self.intents):
+            for keyword in keywords:
+                priority.setdefault(keyword, rank)
+        self._priority = {
+            keyword: min(rank for prefix, rank in priority.items() if keyword.startswith(prefix))
+            for keyword in priority
+        }
+        self._pattern = re.compile("(?=(" + _trie_pattern(priority) + "))")
+
+    def classify(self, text: str) -> str:
+        best = len(self.intents)
+        for match in self._pattern.finditer(text.lower()):
+            priority = self._priority[match.group(1)]
+            if priority < best:
+                best = priority
+                if best == 0:
+                    break
+        return self.intents[best][0] if best < len(self.intents) else self.default
+
+    def classify_batch(self, texts) -> list:
+        """Intents for many texts; repeated texts are matched once."""
+        seen = {}
+        return [seen[text] if text in seen else seen.setdefault(text, self.classify(text)) for text in texts]
+
+HEURISTIC_CLASSIFIER = IntentClassifier(HEURISTIC_INTENTS, default="general")
+INSTRUCTION_CLASSIFIER = IntentClassifier(INSTRUCTION_INTENTS, default="default")
+TIME_CLASSIFIER = IntentClassifier(TIME_INTENTS, default="focus_window")
+
+def instruction_intent(instruction: str) -> str:
+    """Flat response family for a dataset instruction (time queries refined)."""
+    intent = INSTRUCTION_CLASSIFIER.classify(instruction)
+    return TIME_CLASSIFIER.classify(instruction) if intent == "time_query" else intent
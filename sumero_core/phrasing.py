@@ -1,3 +1,5 @@
+import sys
+from functools import lru_cache
 from typing import List
 
 # Industry Standard: Human-Reviewed Controlled Phrases
@@ -26,7 +28,12 @@ def generate_briefing(state: str, reason_codes: List[str], workout_allowed: bool
     """
     Deterministic Phrasing Engine. 
     Constructs a human-readable briefing based strictly on Heuristic decisions.
+    Output depends only on (state, reason_codes, workout_allowed), so it is memoized.
     """
+    return _cached_briefing(state, tuple(reason_codes), bool(workout_allowed))
+
+@lru_cache(maxsize=1024)
+def _cached_briefing(state: str, reason_codes: tuple, workout_allowed: bool) -> str:
     title = STATE_TITLES.get(state, "Health Status Update")
     summary = STATE_SUMMARY.get(state, "No specific guidance available.")
     
@@ -45,4 +52,33 @@ Directives:
 {workout_advice}
     """.strip()
     
-    return briefing
+    return sys.intern(briefing)
+
+class BriefingTable:
+    """
+    Interned briefings addressed by small integer IDs.
+    Batch results store an ID per user; the text lives here once.
+    """
+    def __init__(self):
+        self.briefings = []
+        self._ids_by_key = {}
+        self._ids_by_text = {}
+
+    def briefing_id(self, state: str, reason_codes: List[str], workout_allowed: bool) -> int:
+        key = (state, tuple(reason_codes), bool(workout_allowed))
+        briefing_id = self._ids_by_key.get(key)
+        if briefing_id is None:
+            briefing = _cached_briefing(*key)
+            briefing_id = self._ids_by_text.setdefault(briefing, len(self.briefings))
+            if briefing_id == len(self.briefings):
+                self.briefings.append(briefing)
+            self._ids_by_key[key] = briefing_id
+        return briefing_id
+
+    def __getitem__(self, briefing_id: int) -> str:
+        return self.briefings[briefing_id]
+
+    def __len__(self) -> int:
+        return len(self.briefings)
+
+BRIEFING_TABLE = BriefingTable()
@@ -0,0 +1,59 @@
+import operator
+
+import numpy as np
+import pandas as pd
+
+# Coarse labels stored in the pilot dataset's health_state column (training targets),
+# as opposed to the engine states in health_states.py.
+DEFAULT_STATE = "Balanced"
+
+# (state, combine, conditions): the first state whose conditions hold wins, otherwise DEFAULT_STATE.
+# Conditions are (column, operator, threshold); "present" means a real value that is not "None".
+WHOOP_RULES = (
+    ("Under-Recovered", "any", (("sleep", "<=", 6.1), ("disorder", "present", None))),
+    ("Optimal", "all", (("sleep", ">=", 7.0), ("stress", "<=", 6))),
+)
+
+APPLE_RULES = (
+    ("Under-Recovered", "any", (("sleep", "<", 6.0), ("stress", ">", 7))),
+    ("Optimal", "all", (("sleep", ">", 7.5), ("stress", "<", 5))),
+)
+
+_OPERATORS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+def _present(values) -> np.ndarray:
+    values = pd.Series(values, copy=False)
+    return (values.notna() & ~values.isin(["None", "nan"])).to_numpy()
+
+def _condition_mask(columns: dict, column: str, op: str, threshold) -> np.ndarray:
+    if op == "present":
+        return _present(columns[column])
+    return _OPERATORS[op](np.asarray(columns[column], dtype=float), threshold)
+
+def label_health_states(rules, **columns) -> np.ndarray:
+    """
+    Vectorized pilot labelling: evaluates a rule table (WHOOP_RULES, APPLE_RULES)
+    over whole columns, e.g. label_health_states(WHOOP_RULES, sleep=..., stress=..., disorder=...).
+    Returns an object array of state names.
+    """
+    masks = []
+    for _, combine, conditions in rules:
+        condition_masks = [_condition_mask(columns, *condition) for condition in conditions]
+        reduce = np.logical_or if combine == "any" else np.logical_and
+        masks.append(reduce.reduce(condition_masks))
+
+    return np.select(masks, [state for state, _, _ in rules], default=DEFAULT_STATE).astype(object)
+
+def label_survey_frame(df: pd.DataFrame, rules=WHOOP_RULES) -> np.ndarray:
+    """Labels rows in the Sleep Health survey schema."""
+    return label_health_states(
+        rules,
+        sleep=df["Sleep Duration"],
+        stress=df["Stress Level"],
+        disorder=df["Sleep Disorder"]
+    )
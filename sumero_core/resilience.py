@@ -0,0 +1,106 @@
+import queue
+import threading
+import time
+
+class DeadlineExceeded(Exception):
+    """A streamed call missed its first-token or total latency budget."""
+
+_DONE = object()
+
+def stream_with_deadline(tokens, first_token_timeout: float, total_timeout: float, clock=time.monotonic):
+    """
+    Re-yields an iterator's items from a background thread so a slow producer cannot
+    block the caller past its budget. Raises DeadlineExceeded when the first item takes
+    longer than first_token_timeout or the whole stream longer than total_timeout;
+    the abandoned producer finishes (bounded by its own I/O timeouts) in the background.
+    """
+    items = queue.Queue()
+
+    def produce():
+        try:
+            for item in tokens:
+                items.put((item, None))
+        except Exception as e:
+            items.put((None, e))
+        items.put((_DONE, None))
+
+    threading.Thread(target=produce, daemon=True).start()
+    start = clock()
+    first = True
+    while True:
+        budget = (first_token_timeout if first else total_timeout) - (clock() - start)
+        try:
+            item, error = items.get(timeout=max(budget, 0))
+        except queue.Empty:
+            raise DeadlineExceeded("first token" if first else "total") from None
+        if error is not None:
+            raise error
+        if item is _DONE:
+            return
+        first = False
+        yield item
+
+class CircuitBreaker:
+    """
+    Consecutive-failure breaker. After failure_threshold failures it opens: callers skip the
+    dependency at once. While open, `probe` (a cheap health check returning bool) runs every
+    probe_interval seconds on a background thread and closes the breaker when it succeeds.
+    Without a probe, one trial request is let through per probe_interval instead (half-open).
+    """
+    CLOSED, OPEN = "closed", "open"
+
+    def __init__(self, failure_threshold: int = 3, probe_interval: float = 10.0, probe=None, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.probe_interval = probe_interval
+        self.probe = probe
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.trips = 0
+        self._opened_at = None
+        self._lock = threading.Lock()
+        self._prober = None
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.probe is None and self.clock() - self._opened_at >= self.probe_interval:
+                self._opened_at = self.clock() # one trial per interval
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.CLOSED and self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.trips += 1
+                self._opened_at = self.clock()
+                start_prober = self.probe is not None and (self._prober is None or not self._prober.is_alive())
+            else:
+                start_prober = False
+        if start_prober:
+            self._prober = threading.Thread(target=self._probe_loop, daemon=True)
+            self._prober.start()
+
+    def probe_now(self) -> bool:
+        """One health check; closes the breaker on success."""
+        try:
+            healthy = bool(self.probe())
+        except Exception:
+            healthy = False
+        if healthy:
+            self.record_success()
+        return healthy
+
+    def _probe_loop(self):
+        while self.state == self.OPEN:
+            time.sleep(self.probe_interval)
+            if self.probe_now():
+                return
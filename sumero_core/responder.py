@@ -0,0 +1,254 @@
+import random
+import string
+
+import numpy as np
+import pandas as pd
+
+from .intents import HEURISTIC_CLASSIFIER
+from .sampling import row_priorities
+
+GREETINGS = ("Hey!", "Listen:", "Here's the plan:", "Quick update:")
+
+# Values a template may reference, in the order rows are handed to the compiled templates
+FIELDS = (
+    "prefix", "state", "occ", "age", "hr", "hr_ceiling", "stress", "sleep_dur", "steps",
+    "bmi", "gender", "deep", "rem", "bedtime", "stop_work", "nap_time", "workout_time",
+)
+
+# intent -> ((condition, template), ...): the first condition that holds picks the template;
+# None is the fallback. Conditions are masks computed column-wise in _conditions().
+RESPONSE_TEMPLATES = {
+    # 1. Sleep & Bedtime Queries
+    "sleep": (
+        ("sleep_under_6", "{prefix} you're severely sleep-deprived ({sleep_dur}h). **Critical directive:** Lights out by **{bedtime}** sharp. No exceptions."),
+        ("deep_under_1_2", "{prefix} Deep Sleep is low ({deep:.1f}h). Your brain didn't get enough repair time. Target **{bedtime}** and avoid screens 1hr before."),
+        (None, "{prefix} aim for **{bedtime}** tonight to maintain your {state} state. Consistency is your superpower."),
+    ),
+    # 2. Workout & Exercise Queries
+    "workout": (
+        ("under_recovered", "{prefix} your body is redlining (HR: {hr}, Stress: {stress}/10). **No heavy training today.** Do light yoga or skip entirely. Sleep is your priority."),
+        ("optimal", "{prefix} you're primed! Your HR ({hr} bpm) and recovery metrics say 'go hard.' Hit the gym at **{workout_time}**. Target: High intensity."),
+        (None, "{prefix} you're balanced. Moderate workout is fine (30-40 min cardio). Listen to your body and stop if HR spikes above {hr_ceiling}."),
+    ),
+    # 3. Stress & Mental Health
+    "stress": (
+        ("stress_over_7", "{prefix} stress is critically high ({stress}/10). **Immediate protocol:** Stop work by **{stop_work}**, 10-min meditation, and a short walk. Your nervous system needs a reset."),
+        (None, "{prefix} stress is manageable ({stress}/10). Keep it stable with deep breathing breaks every 2 hours. You're doing well for a {occ}."),
+    ),
+    # 4. Fatigue & Energy Queries
+    "fatigue": (
+        ("sleep_under_6_5", "{prefix} fatigue is expected—you only slept {sleep_dur}h. **Action:** {nap_time} nap (20 min max), water, and finish work by **{stop_work}**."),
+        ("hr_over_80", "{prefix} elevated resting HR ({hr} bpm) signals stress. Hydrate, take 5-min breaks, and avoid caffeine after 2 PM."),
+        (None, "{prefix} fatigue might be mental, not physical. Try a 10-min walk or switch tasks. Your biometrics are stable."),
+    ),
+    # 5. Nap Queries
+    "nap": (
+        ("sleep_under_6_5", "{prefix} a nap is recommended at **{nap_time}**. Keep it to 20 minutes max to avoid grogginess. Set an alarm."),
+        (None, "{prefix} you slept {sleep_dur}h—a nap isn't necessary. If you're tired, it's likely mental fatigue. Try movement instead."),
+    ),
+    # 6. Steps & Activity
+    "activity": (
+        ("steps_under_5000", "{prefix} you're at {steps:,} steps today. Target: 8,000 minimum for a {occ}. Try a 15-min walk after each meal."),
+        ("steps_over_10000", "{prefix} great job! {steps:,} steps is excellent. Pair this with quality sleep (**{bedtime}**) for optimal recovery."),
+        (None, "{prefix} {steps:,} steps is solid. You're on track for baseline health. Keep moving throughout the day."),
+    ),
+    # 7. Work & Productivity
+    "work": (
+        ("stress_over_7", "{prefix} your stress ({stress}/10) is too high for peak productivity. **Hard stop:** **{stop_work}**. Quality > quantity."),
+        (None, "{prefix} you can work until **{stop_work}** safely. After that, wind down to protect tomorrow's performance."),
+    ),
+    # 8. Nutrition & Hydration
+    "nutrition": (
+        (None, "{prefix} hydration first: aim for 2.5L water today. For a {occ} at {age}, protein-rich meals + veggies are key. Avoid heavy carbs after 7 PM."),
+    ),
+    # 9. Heart Rate Queries
+    "heart_rate": (
+        ("hr_over_75", "{prefix} resting HR is elevated ({hr} bpm). This signals stress or fatigue. Prioritize rest and avoid stimulants."),
+        (None, "{prefix} resting HR ({hr} bpm) is healthy. You're in good cardiovascular shape for age {age}."),
+    ),
+    # 10. Recovery & Health State
+    "recovery": (
+        ("has_stages", "{prefix} recovery is nuanced. Deep: {deep:.1f}h, REM: {rem:.1f}h. Both are crucial. Your overall state is **{state}**. Sleep by **{bedtime}** to improve."),
+        (None, "{prefix} your health state is **{state}**. Key drivers: Sleep ({sleep_dur}h), Stress ({stress}/10), HR ({hr}). Fix sleep first."),
+    ),
+    # 11. BMI & Weight
+    "body": (
+        (None, "{prefix} BMI category: {bmi}. For a {gender} at {age}, focus on sleep quality and {steps:,}+ daily steps. Weight follows behavior."),
+    ),
+    # 12. Age-Related Queries
+    "age": (
+        (None, "{prefix} at age {age}, recovery takes longer. Prioritize sleep (**{bedtime}**) and stress management more than younger peers."),
+    ),
+    # 13. Occupation-Specific
+    "occupation": (
+        (None, "{prefix} as a {occ}, your main risk is burnout. Your data shows {state}. Protect your calendar: hard stop at **{stop_work}**."),
+    ),
+    # 14. General "How am I doing?"
+    "overview": (
+        (None, "{prefix} you're in a **{state}** zone. Sleep: {sleep_dur}h, Stress: {stress}/10, Steps: {steps:,}. **Top priority:** Bed by **{bedtime}**."),
+    ),
+    # 15. Default Catch-All
+    "general": (
+        ("under_recovered", "{prefix} you're currently **Under-Recovered**. For a {occ}, this is a red flag. **Protocol:** Sleep by **{bedtime}**, stop work by **{stop_work}**, and avoid high-intensity activity."),
+        ("optimal", "{prefix} you're crushing it! **Optimal** state at {age} is rare. Maintain with: **{bedtime}** sleep, {steps:,}+ steps, and stress under 5."),
+        (None, "{prefix} you're **{state}**—solid baseline. Keep the momentum: bed by **{bedtime}**, moderate activity, and monitor stress."),
+    ),
+}
+
+def compile_template(template: str):
+    """Rewrites named fields to FIELDS positions once; returns a bound str.format taking a row tuple."""
+    parts = []
+    for literal, field, spec, conversion in string.Formatter().parse(template):
+        parts.append(literal.replace("{", "{{").replace("}", "}}"))
+        if field is not None:
+            parts.append("{" + str(FIELDS.index(field)) + ("!" + conversion if conversion else "") + (":" + spec if spec else "") + "}")
+    return "".join(parts).format
+
+# (intent, variant) -> compiled template; variant indexes RESPONSE_TEMPLATES[intent]
+_COMPILED = {
+    intent: [compile_template(template) for _, template in variants]
+    for intent, variants in RESPONSE_TEMPLATES.items()
+}
+
+def _column(rows: pd.DataFrame, name: str, default=None) -> np.ndarray:
+    if name not in rows.columns:
+        return np.full(len(rows), default, dtype=object)
+    return rows[name].to_numpy(dtype=object)
+
+def _numeric(values: np.ndarray) -> np.ndarray:
+    return pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").to_numpy(dtype=float)
+
+def _conditions(state, hr, stress, sleep_dur, steps, deep, rem) -> dict:
+    has_deep = ~pd.isna(deep)
+    return {
+        "sleep_under_6": sleep_dur < 6,
+        "sleep_under_6_5": sleep_dur < 6.5,
+        "deep_under_1_2": has_deep & (_numeric(deep) < 1.2),
+        "has_stages": has_deep & ~pd.isna(rem),
+        "under_recovered": state == "Under-Recovered",
+        "optimal": state == "Optimal",
+        "stress_over_7": stress > 7,
+        "hr_over_80": hr > 80,
+        "hr_over_75": hr > 75,
+        "steps_under_5000": steps < 5000,
+        "steps_over_10000": steps > 10000,
+    }
+
+class HeuristicResponder:
+    """
+    The dashboard's "Heuristic (Stable)" answer engine, importable and batched.
+    respond() answers one prompt; respond_batch() answers (prompt, patient row) pairs
+    column-wise: intents are classified once per distinct prompt, thresholds are evaluated
+    as masks and each answer is a single call into a precompiled template.
+    """
+    def __init__(self, seed: int = None, classifier=HEURISTIC_CLASSIFIER):
+        self.seed = seed
+        self.classifier = classifier
+        self._rng = random.Random(seed) if seed is not None else random
+
+    def respond(self, prompt: str, data, greeting: str = None) -> str:
+        """One answer for a patient row (Series or dict); the greeting is drawn at random unless given."""
+        if greeting is None:
+            greeting = self._rng.choice(GREETINGS)
+        rows = pd.DataFrame([data.to_dict() if isinstance(data, pd.Series) else data])
+        return self._answer([prompt], rows, np.array([greeting], dtype=object))[0]
+
+    def respond_batch(self, prompts, rows: pd.DataFrame, first_index: int = 0) -> list:
+        """
+        Answers prompts[i] for rows.iloc[i]. Greetings come from a hash of the pair's
+        position (first_index + i) and the responder seed, so chunked runs reproduce a full run.
+        """
+        positions = np.arange(first_index, first_index + len(rows))
+        greetings = np.array(GREETINGS, dtype=object)[row_priorities(positions, self.seed or 0) % np.uint64(len(GREETINGS))]
+        return self._answer(list(prompts), rows.reset_index(drop=True), greetings)
+
+    def _answer(self, prompts: list, rows: pd.DataFrame, greetings: np.ndarray) -> list:
+        if len(prompts) != len(rows):
+            raise ValueError(f"Got {len(prompts)} prompts for {len(rows)} rows")
+        intents = self.classifier.classify_batch(prompts)
+
+        # Extract all biometrics
+        state = _column(rows, "health_state")
+        occ = _column(rows, "Occupation").astype(str)
+        age = _column(rows, "Age")
+        hr = _column(rows, "Heart Rate")
+        stress = _column(rows, "Stress Level")
+        sleep_dur = _column(rows, "Sleep Duration")
+        steps = _column(rows, "Daily Steps")
+        source = _column(rows, "Source", "WHOOP-Study")
+        deep = _column(rows, "Deep_Sleep")
+        rem = _column(rows, "REM_Sleep")
+        hr_num, stress_num, sleep_num, steps_num = _numeric(hr), _numeric(stress), _numeric(sleep_dur), _numeric(steps)
+
+        # Dynamic time calculations
+        bedtime = np.where((stress_num > 7) | (state == "Under-Recovered"), "9:15 PM", "10:30 PM").astype(object)
+        stop_work = np.where(stress_num > 8, "4:45 PM", "6:00 PM").astype(object)
+        nap_time = np.where(sleep_num < 6.5, "1:30 PM", "None recommended").astype(object)
+        workout_time = np.where(state == "Optimal", "5:30 PM", "Light stretching only").astype(object)
+
+        # Source prefix
+        apple = (source == "AppleWatch-Raw") & ~pd.isna(deep)
+        prefix = [
+            f"{greeting} Your Apple Watch shows" if is_apple else f"{greeting} Based on your {o} profile at age {a},"
+            for greeting, is_apple, o, a in zip(greetings, apple, occ, age)
+        ]
+        hr_ceiling = [value + 20 if value is not None else None for value in hr]
+
+        # Template choice: first matching condition per intent, as masks
+        conditions = _conditions(state, hr_num, stress_num, sleep_num, steps_num, deep, rem)
+        intents_arr = np.array(intents, dtype=object)
+        variants = np.zeros(len(rows), dtype=np.int64)
+        for intent, options in RESPONSE_TEMPLATES.items():
+            rows_for_intent = intents_arr == intent
+            if not rows_for_intent.any() or len(options) == 1:
+                continue
+            masks = [conditions[name][rows_for_intent] for name, _ in options[:-1]]
+            variants[rows_for_intent] = np.select(masks, list(range(len(masks))), default=len(masks))
+
+        values = zip(
+            prefix, state, occ, age, hr, hr_ceiling, stress, sleep_dur, steps,
+            _column(rows, "BMI Category"), _column(rows, "Gender"), deep, rem,
+            bedtime, stop_work, nap_time, workout_time,
+        )
+        return [_COMPILED[intent][variant](*row) for intent, variant, row in zip(intents, variants.tolist(), values)]
+
+COMMON_QUESTIONS = (
+    "When should I go to bed tonight?",
+    "Is today a good day for a workout?",
+    "How do I lower my stress?",
+    "Why am I so tired?",
+    "How am I doing overall?",
+)
+
+def answer_table(questions, rows: pd.DataFrame, seed: int = 0) -> pd.DataFrame:
+    """Pre-generated answers for every (patient, question) pair, patient-major."""
+    rows = rows.reset_index(drop=True)
+    questions = list(questions)
+    repeated = rows.loc[rows.index.repeat(len(questions))]
+    prompts = questions * len(rows)
+    return pd.DataFrame({
+        "user_index": repeated.index.to_numpy(),
+        "question": prompts,
+        "answer": HeuristicResponder(seed=seed).respond_batch(prompts, repeated),
+    })
+
+if __name__ == "__main__":
+    # python -m sumero_core.responder --output heuristic_answers.csv
+    import argparse
+
+    from dotenv import load_dotenv
+
+    from .storage import load_pilot, pilot_path
+
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Pre-generate heuristic answers for common questions")
+    parser.add_argument("--data", default=pilot_path(), help="Pilot dataset")
+    parser.add_argument("--question", action="append", help="Question to answer (repeatable; default: COMMON_QUESTIONS)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="heuristic_answers.csv")
+    args = parser.parse_args()
+
+    table = answer_table(args.question or COMMON_QUESTIONS, load_pilot(args.data), seed=args.seed)
+    table.to_csv(args.output, index=False)
+    print(f"Wrote {len(table)} answers to {args.output}")
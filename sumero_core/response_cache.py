@@ -0,0 +1,101 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+def normalize_prompt(prompt: str) -> str:
+    """Case, whitespace and trailing punctuation do not change the answer."""
+    return " ".join(prompt.lower().split()).rstrip(" ?!.")
+
+def context_hash(context: str) -> str:
+    return hashlib.sha256(context.encode("utf-8")).hexdigest()
+
+def cache_key(backend: str, model: str, context: str, prompt: str) -> str:
+    """Key for a response: backend/model, the patient context (hashed) and the normalized prompt."""
+    raw = "\x1f".join([backend, model, context_hash(context), normalize_prompt(prompt)])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class ResponseCache:
+    """
+    Two-tier response cache: an in-memory LRU with TTL, backed by an optional SQLite
+    file that survives restarts. Disk hits are promoted into memory. Thread-safe, so
+    one instance can be shared by every Streamlit session.
+    """
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600, db_path: str = None, clock=time.time):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._memory = OrderedDict() # key -> (stored_at, response)
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, stored_at REAL, response TEXT)")
+            self._db.commit()
+
+    def _fresh(self, stored_at: float) -> bool:
+        return self.ttl is None or self.clock() - stored_at < self.ttl
+
+    def _remember(self, key: str, stored_at: float, response: str):
+        self._memory[key] = (stored_at, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def get(self, key: str):
+        """The cached response, or None on a miss."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if self._fresh(entry[0]):
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return entry[1]
+                del self._memory[key]
+                self._stats["expired"] += 1
+
+            if self._db is not None:
+                row = self._db.execute("SELECT stored_at, response FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    if self._fresh(row[0]):
+                        self._remember(key, row[0], row[1])
+                        self._stats["disk_hits"] += 1
+                        return row[1]
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._db.commit()
+                    self._stats["expired"] += 1
+
+            self._stats["misses"] += 1
+            return None
+
+    def set(self, key: str, response: str):
+        with self._lock:
+            stored_at = self.clock()
+            self._remember(key, stored_at, response)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?)", (key, stored_at, response))
+                self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats, entries=len(self._memory))
+        stats["hits"] = stats["memory_hits"] + stats["disk_hits"]
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
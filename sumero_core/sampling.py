@@ -0,0 +1,44 @@
+import numpy as np
+
+_GOLDEN = 0x9E3779B97F4A7C15
+_MASK64 = (1 << 64) - 1
+
+def row_priorities(row_index, seed: int = 0) -> np.ndarray:
+    """
+    Stateless per-row pseudo-random uint64 (SplitMix64 of the global row index).
+    The value for a row never depends on chunking or sharding.
+    """
+    z = np.asarray(row_index, dtype=np.uint64) + np.uint64((seed * _GOLDEN) & _MASK64)
+    z = z + np.uint64(_GOLDEN)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+class BottomKReservoir:
+    """
+    Bounded sample of rows: keeps the k rows with the smallest row_priorities.
+    Merging reservoirs gives exactly the sample one pass over all rows would keep.
+    """
+    def __init__(self, k: int, seed: int = 0):
+        self.k = k
+        self.seed = seed
+        self._items = [] # (priority, row_index, value)
+
+    def offer(self, row_index, values):
+        row_index = np.asarray(row_index)
+        if self.k <= 0 or len(row_index) == 0:
+            return
+        priorities = row_priorities(row_index, self.seed)
+        if len(priorities) > self.k:
+            keep = np.argpartition(priorities, self.k - 1)[:self.k]
+        else:
+            keep = np.arange(len(priorities))
+        candidates = [(int(priorities[i]), int(row_index[i]), values[i]) for i in keep]
+        self._items = sorted(self._items + candidates)[:self.k]
+
+    def merge(self, other: "BottomKReservoir"):
+        self._items = sorted(self._items + other._items)[:self.k]
+
+    def items(self) -> list:
+        """(row_index, value) pairs in row order."""
+        return sorted((row_index, value) for _, row_index, value in self._items)
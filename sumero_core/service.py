@@ -0,0 +1,332 @@
+import asyncio
+import json
+import re
+import time
+from collections import deque
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from .engine import run_engine, run_engine_batch
+from .inputs import EngineInput, parse_blood_pressure
+from .phrasing import BRIEFING_TABLE
+from .stats import percentile
+
+# Cheap structural checks mirroring inputs_schema.json; the engine needs only these fields
+RANGES = {
+    "sleep_hours": (0, 24),
+    "stress_level": (1, 10),
+    "resting_hr": (20, 250),
+}
+INTEGER_FIELDS = ("stress_level", "resting_hr")
+_BP_PATTERN = re.compile(r"^\d{2,3}/\d{2,3}$")
+
+MAX_BODY_BYTES = 32 * 1024 * 1024
+MAX_ERRORS = 20
+
+class RequestError(Exception):
+    """Rejected request; becomes a JSON error response with the given status."""
+    def __init__(self, status: int, message, details=None):
+        super().__init__(message)
+        self.status = status
+        self.details = details
+
+def validate_input(record) -> tuple:
+    """(sleep_hours, stress_level, resting_hr, blood_pressure) for a raw input dict, or ValueError."""
+    if not isinstance(record, dict):
+        raise ValueError("input must be an object")
+    values = []
+    for field, (low, high) in RANGES.items():
+        value = record.get(field)
+        if value is None:
+            raise ValueError(f"{field} is required")
+        # bool is an int subclass; True is not a stress level
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"{field} must be a number")
+        if not low <= value <= high: # also rejects NaN
+            raise ValueError(f"{field} must be between {low} and {high}")
+        if field in INTEGER_FIELDS and value != int(value):
+            raise ValueError(f"{field} must be an integer")
+        values.append(value)
+    bp = record.get("blood_pressure", "120/80")
+    if not isinstance(bp, str) or not _BP_PATTERN.match(bp):
+        raise ValueError("blood_pressure must look like 120/80")
+    values.append(bp)
+    return tuple(values)
+
+@lru_cache(maxsize=8192)
+def decide_json(sleep_hours, stress_level, resting_hr, blood_pressure) -> bytes:
+    """run_engine for one validated input, serialized. Decisions are deterministic, so repeats are free."""
+    systolic_bp, diastolic_bp, bp_valid = parse_blood_pressure(blood_pressure)
+    decision = run_engine(EngineInput(sleep_hours, stress_level, resting_hr, systolic_bp, diastolic_bp, bp_valid))
+    return json.dumps(decision).encode("utf-8")
+
+def _row_decision(decisions: pd.DataFrame, row: int) -> dict:
+    """One batch row as run_engine returns it, same key order, so both endpoints serialize alike."""
+    decision = {}
+    for column, value in decisions.iloc[row].items():
+        if column == "briefing_id":
+            decision["briefing"] = BRIEFING_TABLE[value]
+        elif column in ("workout_allowed", "nap_recommended"):
+            decision[column] = bool(value)
+        elif column == "hydration_target_liters":
+            decision[column] = float(value)
+        else:
+            decision[column] = value
+    return decision
+
+def decide_batch_json(rows) -> list:
+    """
+    Serialized decisions for validated input tuples, one bytes object per row.
+    run_engine_batch computes the columns; a decision is fixed by its briefing
+    (state and reasons) plus the nap flag, so each distinct one is encoded once.
+    """
+    sleep_hours, stress_level, resting_hr, blood_pressure = zip(*rows)
+    decisions = run_engine_batch({
+        "sleep_hours": sleep_hours,
+        "stress_level": np.asarray(stress_level, dtype=np.int64),
+        "resting_hr": np.asarray(resting_hr, dtype=np.int64),
+        "blood_pressure": blood_pressure,
+    }, briefing_ids=True)
+    keys = decisions["briefing_id"].to_numpy(dtype=np.int64) * 2 + decisions["nap_recommended"].to_numpy()
+    codes, uniques = pd.factorize(keys)
+    first_rows = np.zeros(len(uniques), dtype=np.int64)
+    first_rows[codes[::-1]] = np.arange(len(codes))[::-1]
+    encoded = [json.dumps(_row_decision(decisions, row)).encode("utf-8") for row in first_rows]
+    return [encoded[code] for code in codes]
+
+class ServiceMetrics:
+    """In-process request counters and a rolling latency window per route."""
+    def __init__(self, window: int = 10_000):
+        self.started = time.time()
+        self.requests = {}
+        self.statuses = {}
+        self.decisions = 0
+        self._latencies = {}
+        self._window = window
+
+    def record(self, route: str, status: int, latency: float, decisions: int = 0):
+        self.requests[route] = self.requests.get(route, 0) + 1
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        self.decisions += decisions
+        self._latencies.setdefault(route, deque(maxlen=self._window)).append(latency)
+
+    def snapshot(self) -> dict:
+        cache = decide_json.cache_info()
+        latency_ms = {
+            route: {f"p{q}": percentile(values, q) * 1000 for q in (50, 90, 99)}
+            for route, values in self._latencies.items() if values
+        }
+        return {
+            "uptime_seconds": time.time() - self.started,
+            "requests": dict(self.requests),
+            "statuses": {str(status): count for status, count in self.statuses.items()},
+            "decisions": self.decisions,
+            "latency_ms": latency_ms,
+            "decision_cache": {"hits": cache.hits, "misses": cache.misses, "size": cache.currsize},
+        }
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            411: "Length Required", 413: "Payload Too Large", 431: "Request Header Fields Too Large",
+            500: "Internal Server Error"}
+
+class DecisionService:
+    """
+    Minimal asyncio HTTP/1.1 server (keep-alive, no framework) for engine decisions:
+
+        POST /v1/decision          one Input Schema object -> decision object
+        POST /v1/decisions         {"inputs": [...]} -> {"decisions": [...]}, or NDJSON
+                                   (one decision per line, chunked) when the batch exceeds
+                                   stream_threshold or the client sends Accept: application/x-ndjson
+        GET  /metrics, GET /health
+    """
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765, stream_threshold: int = 1000, chunk_rows: int = 5000):
+        self.host = host
+        self.port = port
+        self.stream_threshold = stream_threshold
+        self.chunk_rows = chunk_rows
+        self.metrics = ServiceMetrics()
+        self._server = None
+        self._routes = {
+            ("POST", "/v1/decision"): self._decide,
+            ("POST", "/v1/decisions"): self._decide_batch,
+            ("GET", "/metrics"): self._metrics,
+            ("GET", "/health"): self._health,
+        }
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1] # resolves port=0
+        return self
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def serve_forever(self):
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    # --- Handlers: return (status, body) or (status, async iterator of NDJSON chunks) plus a decision count ---
+
+    def _decide(self, body, headers):
+        record = _parse_json(body)
+        try:
+            values = validate_input(record)
+        except ValueError as e:
+            raise RequestError(400, str(e)) from None
+        return 200, decide_json(*values), 1
+
+    def _decide_batch(self, body, headers):
+        payload = _parse_json(body)
+        inputs = payload.get("inputs") if isinstance(payload, dict) else None
+        if not isinstance(inputs, list):
+            raise RequestError(400, "body must be {\"inputs\": [...]}")
+
+        rows, errors = [], []
+        for index, record in enumerate(inputs):
+            try:
+                rows.append(validate_input(record))
+            except ValueError as e:
+                errors.append({"index": index, "error": str(e)})
+                if len(errors) >= MAX_ERRORS:
+                    break
+        if errors:
+            raise RequestError(400, f"{len(errors)}+ invalid inputs" if len(errors) >= MAX_ERRORS else f"{len(errors)} invalid inputs", errors)
+
+        if len(rows) > self.stream_threshold or "application/x-ndjson" in headers.get("accept", ""):
+            return 200, self._ndjson_chunks(rows), len(rows)
+        decisions = decide_batch_json(rows) if rows else []
+        return 200, b'{"decisions": [' + b", ".join(decisions) + b"]}", len(rows)
+
+    async def _ndjson_chunks(self, rows):
+        for start in range(0, len(rows), self.chunk_rows):
+            yield b"\n".join(decide_batch_json(rows[start:start + self.chunk_rows])) + b"\n"
+            await asyncio.sleep(0) # let other connections in between chunks
+
+    def _metrics(self, body, headers):
+        return 200, json.dumps(self.metrics.snapshot()).encode("utf-8"), 0
+
+    def _health(self, body, headers):
+        return 200, b'{"status": "ok"}', 0
+
+    # --- HTTP ---
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._send(writer, 431, _error_body("headers too large"), keep_alive=False)
+                    break
+
+                start = time.perf_counter()
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    await self._send(writer, 400, _error_body("malformed request line"), keep_alive=False)
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(":")
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                path = target.split("?", 1)[0]
+
+                if "chunked" in headers.get("transfer-encoding", "").lower():
+                    await self._send(writer, 411, _error_body("send a Content-Length body"), keep_alive=False)
+                    break
+                try:
+                    length = int(headers.get("content-length", 0) or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self._send(writer, 400, _error_body("bad Content-Length"), keep_alive=False)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self._send(writer, 413, _error_body("body too large"), keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                status, decisions = await self._dispatch(writer, method, path, headers, body, keep_alive)
+                route = path if (method, path) in self._routes else "other"
+                self.metrics.record(route, status, time.perf_counter() - start, decisions)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, writer, method, path, headers, body, keep_alive):
+        handler = self._routes.get((method, path))
+        try:
+            if handler is None:
+                known = any(route_path == path for _, route_path in self._routes)
+                raise RequestError(405 if known else 404, f"{method} {path} is not supported")
+            status, payload, decisions = handler(body, headers)
+        except RequestError as e:
+            await self._send(writer, e.status, _error_body(str(e), e.details), keep_alive)
+            return e.status, 0
+        except Exception as e:
+            await self._send(writer, 500, _error_body(f"{type(e).__name__}: {e}"), keep_alive)
+            return 500, 0
+
+        if isinstance(payload, bytes):
+            await self._send(writer, status, payload, keep_alive)
+        else:
+            await self._stream(writer, status, payload, keep_alive)
+        return status, decisions
+
+    async def _send(self, writer, status, body, keep_alive):
+        writer.write(_head(status, "application/json", keep_alive, f"Content-Length: {len(body)}") + body)
+        await writer.drain()
+
+    async def _stream(self, writer, status, chunks, keep_alive):
+        writer.write(_head(status, "application/x-ndjson", keep_alive, "Transfer-Encoding: chunked"))
+        async for chunk in chunks:
+            writer.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            await writer.drain() # backpressure: a slow client does not buffer the whole batch
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+def _head(status, content_type, keep_alive, framing) -> bytes:
+    connection = "keep-alive" if keep_alive else "close"
+    return (f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\nContent-Type: {content_type}\r\n"
+            f"{framing}\r\nConnection: {connection}\r\n\r\n").encode("latin-1")
+
+def _error_body(message, details=None) -> bytes:
+    error = {"error": message}
+    if details is not None:
+        error["details"] = details
+    return json.dumps(error).encode("utf-8")
+
+def _parse_json(body: bytes):
+    try:
+        return json.loads(body)
+    except ValueError:
+        raise RequestError(400, "body must be JSON") from None
+
+if __name__ == "__main__":
+    # python -m sumero_core.service --port 8765
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve engine decisions over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--stream-threshold", type=int, default=1000, help="Batches larger than this are streamed as NDJSON")
+    args = parser.parse_args()
+
+    service = DecisionService(args.host, args.port, stream_threshold=args.stream_threshold)
+    print(f"Serving decisions on http://{args.host}:{args.port}")
+    try:
+        asyncio.run(service.serve_forever())
+    except KeyboardInterrupt:
+        pass
@@ -1,57 +1,60 @@
 import pandas as pd
+import argparse
+import io
+import shutil
 import sys
 import os
+from concurrent.futures import ProcessPoolExecutor
 
 # Add parent directory to path to allow imports
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
 
-from sumero_core.engine import run_engine
+from sumero_core.engine import run_engine_batch
+from sumero_core.phrasing import BRIEFING_TABLE
+from sumero_core.sampling import BottomKReservoir
+from sumero_core.storage import ByteRangeReader, count_csv_rows, csv_shard_ranges
 
-def run_simulation():
+DEFAULT_DATA_PATH = os.path.join(PROJECT_ROOT, 'Sleep_health_and_lifestyle_dataset.csv')
+
+def to_engine_inputs(df: pd.DataFrame) -> dict:
+    """Map CSV columns to our Engine Input Schema (column-wise)."""
+    return {
+        "sleep_hours": df['Sleep Duration'].to_numpy(dtype=float),
+        "stress_level": df['Stress Level'].to_numpy(dtype=int),
+        "resting_hr": df['Heart Rate'].to_numpy(dtype=int),
+        "blood_pressure": df['Blood Pressure'].to_numpy(dtype=object)
+    }
+
+def run_simulation(data_path: str = DEFAULT_DATA_PATH):
     # 1. Load Data
-    data_path = os.path.join(os.path.dirname(__file__), 'data', 'Sleep_health_and_lifestyle_dataset.csv')
     try:
         df = pd.read_csv(data_path)
     except FileNotFoundError:
-        print("Error: Dataset not found in sumero_core/data/")
+        print(f"Error: Dataset not found at {data_path}")
         return
 
     print(f"Loaded {len(df)} users for simulation.")
     print("-" * 40)
 
-    # 2. Iterate and Decide
-    results_objects = []
-    for _, row in df.iterrows():
-        # Map CSV columns to our Engine Input Schema
-        inputs = {
-            "sleep_hours": float(row['Sleep Duration']),
-            "stress_level": int(row['Stress Level']),
-            "resting_hr": int(row['Heart Rate']),
-            "blood_pressure": str(row['Blood Pressure']),
-            "age": int(row['Age']),
-            "occupation": str(row['Occupation'])
-        }
-
-        # The Brain decides
-        decision = run_engine(inputs)
-        results_objects.append(decision)
+    # 2. Decide in one pass (The Brain decides)
+    results = run_engine_batch(to_engine_inputs(df))
 
     # 3. Analyze Results
-    total = len(results_objects)
-    states = [r['health_state'] for r in results_objects]
-    counts = pd.Series(states).value_counts()
+    total = len(results)
+    counts = results['health_state'].value_counts()
     
     print("SIMULATION REPORT")
     print("-" * 40)
     print(f"Total Analyzed: {total}")
     print("\nSample Briefings (First 5 Users):")
-    for i, res in enumerate(results_objects[:5]):
-        print(f"\nUser {i+1} Briefing:\n{res['briefing']}")
+    for i, briefing in enumerate(results['briefing'].iloc[:5]):
+        print(f"\nUser {i+1} Briefing:\n{briefing}")
         print("-" * 20)
 
     print("\nTargeted Verification (User 265 - The 'Silent Strain' Case):")
     # Using index 264 for the 265th row (0-indexed)
-    print(f"User 265 Briefing:\n{results_objects[264]['briefing']}")
+    print(f"User 265 Briefing:\n{results['briefing'].iloc[264]}")
     print("-" * 20)
 
     print("\nState Distribution:")
@@ -59,5 +62,128 @@ def run_simulation():
         percentage = (count / total) * 100
         print(f"  {state}: {count} ({percentage:.1f}%)")
 
+def score_chunk(chunk: pd.DataFrame, start: int, reservoir: BottomKReservoir, counts: dict, output_path: str = None) -> pd.DataFrame:
+    """
+    Scores one chunk whose first row is global row `start`.
+    Updates counts and the sample reservoir in place; appends decisions to output_path.
+    """
+    decisions = run_engine_batch(to_engine_inputs(chunk), briefing_ids=True)
+    row_index = range(start, start + len(decisions))
+    decisions.index = pd.RangeIndex(start, start + len(decisions), name="user_index")
+
+    for state, count in decisions['health_state'].value_counts(sort=False).items():
+        counts[state] = counts.get(state, 0) + int(count)
+    reservoir.offer(row_index, decisions['briefing_id'].to_numpy())
+
+    if output_path:
+        out = decisions.assign(reason_codes=decisions['reason_codes'].map("|".join))
+        out.to_csv(output_path, mode="a", header=start == 0)
+
+    return decisions
+
+def run_simulation_streaming(data_path: str = DEFAULT_DATA_PATH, chunksize: int = 100_000, sample_size: int = 5,
+                             output_path: str = None, seed: int = 0, workers: int = 1) -> dict:
+    """
+    Streaming backtest: reads data_path in chunks so memory stays flat for any row count.
+    Only counts, a bounded sample reservoir and (optionally) an output CSV are kept.
+    With workers > 1 the file is split into row-range shards scored in a process pool;
+    the merged report and output are identical to the serial run.
+    """
+    if not os.path.exists(data_path):
+        print(f"Error: Dataset not found at {data_path}")
+        return None
+    if output_path and os.path.exists(output_path):
+        os.remove(output_path)
+
+    if workers > 1:
+        summary = _run_sharded(data_path, chunksize, sample_size, output_path, seed, workers)
+    else:
+        counts = {}
+        reservoir = BottomKReservoir(sample_size, seed=seed)
+        total = 0
+        for chunk in pd.read_csv(data_path, chunksize=chunksize):
+            score_chunk(chunk, total, reservoir, counts, output_path)
+            total += len(chunk)
+        summary = {"total": total, "counts": counts, "samples": reservoir.items()}
+
+    print_streaming_report(summary)
+    return summary
+
+def _score_shard(args) -> tuple:
+    data_path, columns, start, end, first_row, chunksize, sample_size, seed, part_path = args
+    counts = {}
+    reservoir = BottomKReservoir(sample_size, seed=seed)
+    row = first_row
+    with io.BufferedReader(ByteRangeReader(data_path, start, end)) as shard:
+        for chunk in pd.read_csv(shard, header=None, names=columns, chunksize=chunksize):
+            score_chunk(chunk, row, reservoir, counts, part_path)
+            row += len(chunk)
+    return counts, reservoir, row - first_row
+
+def _run_sharded(data_path: str, chunksize: int, sample_size: int, output_path: str, seed: int, workers: int) -> dict:
+    columns, ranges = csv_shard_ranges(data_path, workers)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Pass 1: row counts give each shard its global starting row
+        row_counts = list(pool.map(count_csv_rows, [data_path] * len(ranges), *zip(*ranges)))
+        first_rows = [sum(row_counts[:i]) for i in range(len(ranges))]
+
+        # Pass 2: score shards; each appends to its own part file
+        part_paths = [f"{output_path}.part{i:04d}" if output_path else None for i in range(len(ranges))]
+        jobs = [
+            (data_path, columns, start, end, first_row, chunksize, sample_size, seed, part_path)
+            for (start, end), first_row, part_path in zip(ranges, first_rows, part_paths)
+        ]
+        shard_results = list(pool.map(_score_shard, jobs))
+
+    # Deterministic merge in shard (= row) order
+    counts = {}
+    reservoir = BottomKReservoir(sample_size, seed=seed)
+    total = 0
+    for shard_counts, shard_reservoir, rows in shard_results:
+        for state, count in shard_counts.items():
+            counts[state] = counts.get(state, 0) + count
+        reservoir.merge(shard_reservoir)
+        total += rows
+
+    if output_path:
+        with open(output_path, "wb") as out:
+            for part_path in part_paths:
+                if os.path.exists(part_path):
+                    with open(part_path, "rb") as part:
+                        shutil.copyfileobj(part, out)
+                    os.remove(part_path)
+
+    return {"total": total, "counts": counts, "samples": reservoir.items()}
+
+def print_streaming_report(summary: dict):
+    total = summary["total"]
+
+    print("SIMULATION REPORT (STREAMING)")
+    print("-" * 40)
+    print(f"Total Analyzed: {total}")
+    print(f"\nSample Briefings ({len(summary['samples'])} Sampled Users):")
+    for row_index, briefing_id in summary["samples"]:
+        print(f"\nUser {row_index+1} Briefing:\n{BRIEFING_TABLE[briefing_id]}")
+        print("-" * 20)
+
+    print("\nState Distribution:")
+    for state, count in sorted(summary["counts"].items(), key=lambda item: (-item[1], item[0])):
+        percentage = (count / total) * 100
+        print(f"  {state}: {count} ({percentage:.1f}%)")
+
 if __name__ == "__main__":
-    run_simulation()
+    parser = argparse.ArgumentParser(description="Sumero Core backtesting rig")
+    parser.add_argument("--data", default=DEFAULT_DATA_PATH, help="Input CSV (Sleep Health schema)")
+    parser.add_argument("--stream", action="store_true", help="Score in chunks with flat memory use")
+    parser.add_argument("--chunksize", type=int, default=100_000, help="Rows per chunk in streaming mode")
+    parser.add_argument("--samples", type=int, default=5, help="Sample briefings to keep in streaming mode")
+    parser.add_argument("--output", default=None, help="Write per-user decisions to this CSV (streaming mode)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the sample reservoir")
+    parser.add_argument("--workers", type=int, default=1, help="Score row-range shards in N processes (implies --stream)")
+    args = parser.parse_args()
+
+    if args.stream or args.workers > 1:
+        run_simulation_streaming(args.data, args.chunksize, args.samples, args.output, args.seed, args.workers)
+    else:
+        run_simulation(args.data)
@@ -0,0 +1,7 @@
+def percentile(values, q: float) -> float:
+    """Linear-interpolated q-th percentile (0-100) of a non-empty sequence."""
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * q / 100
+    low = int(pos)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (pos - low)
@@ -0,0 +1,239 @@
+import csv
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+# pilot_clean.csv is the hub of the pipeline. Point SUMERO_PILOT_PATH at a
+# .parquet or .arrow/.feather file to switch every stage to typed columnar storage.
+DEFAULT_PILOT_PATH = "pilot_clean.csv"
+
+def pilot_path() -> str:
+    """The pilot dataset path, read when called so a .env loaded after import still applies."""
+    return os.getenv("SUMERO_PILOT_PATH", DEFAULT_PILOT_PATH)
+
+BP_COLUMNS = ["Systolic BP", "Diastolic BP"]
+
+# Explicit storage schema for the columnar formats
+PILOT_SCHEMA = {
+    "Gender": "category",
+    "Age": "int8",
+    "Occupation": "category",
+    "Sleep Duration": "float64",
+    "Quality of Sleep": "int8",
+    "Physical Activity Level": "int8",
+    "Stress Level": "int8",
+    "BMI Category": "category",
+    "Systolic BP": "int16",
+    "Diastolic BP": "int16",
+    "Heart Rate": "int16",
+    "Daily Steps": "int32",
+    "Sleep Disorder": "category",
+    "health_state": "category",
+    "Source": "category",
+    "Deep_Sleep": "float32",
+    "REM_Sleep": "float32",
+}
+
+COLUMNAR_EXTENSIONS = (".parquet", ".arrow", ".feather")
+
+def _require_pyarrow():
+    try:
+        import pyarrow # noqa: F401
+    except ImportError as e:
+        raise ImportError("Columnar pilot storage needs pyarrow (pip install pyarrow).") from e
+
+def to_typed(df: pd.DataFrame) -> pd.DataFrame:
+    """Applies PILOT_SCHEMA; 'Blood Pressure' is split into two small-int columns in place."""
+    typed = df.copy()
+    if "Blood Pressure" in typed.columns:
+        bp = typed["Blood Pressure"].astype("string").str.extract(r"^\s*(\d+)\s*/\s*(\d+)\s*$")
+        position = typed.columns.get_loc("Blood Pressure")
+        typed = typed.drop(columns="Blood Pressure")
+        for offset, column in enumerate(BP_COLUMNS):
+            typed.insert(position + offset, column, pd.to_numeric(bp[offset]))
+
+    for column, dtype in PILOT_SCHEMA.items():
+        if column not in typed.columns:
+            continue
+        if dtype.startswith("int") and typed[column].isna().any():
+            dtype = dtype.capitalize() # nullable Int8/Int16/Int32
+        typed[column] = typed[column].astype(dtype)
+    return typed
+
+def from_typed(df: pd.DataFrame) -> pd.DataFrame:
+    """Rebuilds the categorical 'Blood Pressure' string column readers expect."""
+    if not set(BP_COLUMNS) <= set(df.columns):
+        return df
+    systolic, diastolic = df[BP_COLUMNS[0]], df[BP_COLUMNS[1]]
+    valid = (systolic.notna() & diastolic.notna()).to_numpy()
+    key = np.where(valid, systolic.fillna(0).to_numpy(np.int64) * 1000 + diastolic.fillna(0).to_numpy(np.int64), -1)
+
+    # Format each distinct reading once
+    codes, uniques = pd.factorize(key)
+    categories = [f"{k // 1000}/{k % 1000}" for k in uniques if k >= 0]
+    category_codes = np.cumsum(uniques >= 0) - 1
+    category_codes[uniques < 0] = -1
+    bp = pd.Categorical.from_codes(category_codes[codes], categories=categories)
+
+    position = df.columns.get_loc(BP_COLUMNS[0])
+    df = df.drop(columns=BP_COLUMNS)
+    df.insert(position, "Blood Pressure", bp)
+    return df
+
+def save_pilot(df: pd.DataFrame, path: str = None):
+    """Writes the pilot dataset (default: pilot_path()); the format follows the file extension."""
+    path = path or pilot_path()
+    if not path.endswith(COLUMNAR_EXTENSIONS):
+        df.to_csv(path, index=False)
+        return
+
+    _require_pyarrow()
+    import pyarrow as pa
+    table = pa.Table.from_pandas(to_typed(df), preserve_index=False)
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        pq.write_table(table, path)
+    else:
+        # Uncompressed Arrow IPC so readers can memory-map it
+        import pyarrow.feather as feather
+        feather.write_feather(table, path, compression="uncompressed")
+
+def load_pilot(path: str = None, columns: list = None, memory_map: bool = True, split_bp: bool = False) -> pd.DataFrame:
+    """
+    Reads the pilot dataset (default: pilot_path()) with optional column projection.
+    Columnar files are memory-mapped and come back typed (categoricals, small ints);
+    'Blood Pressure' is rebuilt from its int columns unless split_bp=True.
+    """
+    path = path or pilot_path()
+    if not path.endswith(COLUMNAR_EXTENSIONS):
+        return pd.read_csv(path, usecols=columns)
+
+    _require_pyarrow()
+    read_columns = None
+    if columns is not None:
+        read_columns = []
+        for column in columns:
+            read_columns.extend(BP_COLUMNS if column == "Blood Pressure" else [column])
+
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        table = pq.read_table(path, columns=read_columns, memory_map=memory_map)
+    else:
+        import pyarrow.feather as feather
+        table = feather.read_table(path, columns=read_columns, memory_map=memory_map)
+
+    df = table.to_pandas()
+    return df if split_bp else from_typed(df)
+
+# --- Chunked & Sharded Reads ---
+# Shards are (start, end) ranges: bytes aligned on line boundaries for CSV, rows for
+# columnar files. Each shard can be read independently by a worker process.
+
+class ByteRangeReader(io.RawIOBase):
+    """Read-only view of bytes [start, end) of a file."""
+    def __init__(self, path: str, start: int, end: int):
+        self._file = open(path, "rb")
+        self._file.seek(start)
+        self._remaining = end - start
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if self._remaining <= 0:
+            return 0
+        view = memoryview(buffer)[:self._remaining]
+        n = self._file.readinto(view)
+        self._remaining -= n
+        return n
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+def csv_shard_ranges(path: str, shards: int) -> tuple:
+    """Splits the data rows of a CSV into byte ranges aligned on line boundaries."""
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        header = f.readline()
+        data_start = f.tell()
+        bounds = [data_start]
+        for k in range(1, shards):
+            f.seek(max(data_start + k * (size - data_start) // shards - 1, bounds[-1]))
+            f.readline()
+            bounds.append(max(f.tell(), bounds[-1]))
+    bounds.append(size)
+    columns = next(csv.reader([header.decode("utf-8-sig")]))
+    return columns, [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+def count_csv_rows(path: str, start: int, end: int) -> int:
+    rows, last = 0, b"\n"
+    with ByteRangeReader(path, start, end) as raw:
+        while block := raw.read(1 << 20):
+            rows += block.count(b"\n")
+            last = block[-1:]
+    return rows + (last != b"\n")
+
+def pilot_shards(path: str, shards: int, map_fn=map) -> list:
+    """
+    [(start, end, first_row)] covering the pilot dataset. first_row is the global index of
+    each shard's first row; pass a pool's map to count CSV shards in parallel.
+    """
+    if not path.endswith(COLUMNAR_EXTENSIONS):
+        _, ranges = csv_shard_ranges(path, shards)
+        row_counts = list(map_fn(count_csv_rows, [path] * len(ranges), *zip(*ranges))) if ranges else []
+        first_rows = np.cumsum([0] + row_counts[:-1]).tolist()
+        return [(start, end, first_row) for (start, end), first_row in zip(ranges, first_rows)]
+
+    _require_pyarrow()
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        total = pq.ParquetFile(path).metadata.num_rows
+    else:
+        import pyarrow.feather as feather
+        total = feather.read_table(path, memory_map=True).num_rows
+    bounds = [total * k // shards for k in range(shards + 1)]
+    return [(start, end, start) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+def _columnar_slices(path: str, start: int, end: int):
+    """Arrow tables for rows [start, end) without materialising the rest of the file."""
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(path, memory_map=True)
+        offset = 0
+        for group in range(parquet_file.num_row_groups):
+            rows = parquet_file.metadata.row_group(group).num_rows
+            if offset < end and offset + rows > start:
+                table = parquet_file.read_row_group(group)
+                lo = max(start - offset, 0)
+                yield table.slice(lo, min(end - offset, rows) - lo)
+            offset += rows
+    else:
+        import pyarrow.feather as feather
+        table = feather.read_table(path, memory_map=True)
+        yield table.slice(start, max(min(end, table.num_rows) - start, 0))
+
+def iter_pilot(path: str = None, chunksize: int = 100_000, shard: tuple = None):
+    """
+    Yields the pilot dataset (default: pilot_path()), or one shard from pilot_shards,
+    as DataFrame chunks with the same column types load_pilot returns.
+    """
+    path = path or pilot_path()
+    if not path.endswith(COLUMNAR_EXTENSIONS):
+        if shard is None:
+            yield from pd.read_csv(path, chunksize=chunksize)
+            return
+        start, end = shard[:2]
+        with open(path, "rb") as f:
+            columns = next(csv.reader([f.readline().decode("utf-8-sig")]))
+        with io.BufferedReader(ByteRangeReader(path, start, end)) as raw:
+            yield from pd.read_csv(raw, header=None, names=columns, chunksize=chunksize)
+        return
+
+    _require_pyarrow()
+    start, end = shard[:2] if shard is not None else (0, float("inf"))
+    for table in _columnar_slices(path, start, end):
+        for offset in range(0, table.num_rows, chunksize):
+            yield from_typed(table.slice(offset, chunksize).to_pandas())
@@ -0,0 +1,210 @@
+import unittest
+import sys
+import os
+import importlib.util
+import json
+import tempfile
+
+import pandas as pd
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+def load_script(filename: str):
+    """Imports a numbered script (e.g. 1c_aggregate_apple.py) as a module."""
+    spec = importlib.util.spec_from_file_location("script_" + filename[:2], os.path.join(project_root, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+SLEEP_HEADER = "Start Time,End Time,Category,Timestamp,Heart Rate,Source Name\n"
+HR_HEADER = "Timestamp,Heart Rate\n"
+STAGES = ("Light/Core", "Deep", "REM", "Core", "Awake")
+
+def sleep_lines(days, with_hr=True):
+    """Five 70-minute stage intervals per night from 01:00; 1b's layout leaves Timestamp/Heart Rate empty."""
+    lines = []
+    for day in pd.date_range("2022-09-01", periods=days):
+        for i, stage in enumerate(STAGES):
+            start = day + pd.Timedelta(hours=1, minutes=70 * i)
+            end = start + pd.Timedelta(minutes=70 - day.day % 7)
+            hr = f"{start:%Y-%m-%d %H:%M:%S},{60 + i}" if with_hr else ","
+            lines.append(f"{start:%Y-%m-%d %H:%M:%S},{end:%Y-%m-%d %H:%M:%S},{stage},{hr},Apple Watch\n")
+    return lines
+
+def hr_lines(days):
+    lines = []
+    for day in pd.date_range("2022-09-01", periods=days):
+        for minute in range(0, 9 * 60, 20): # night samples to 06:59, then two daytime ones
+            lines.append(f"{day + pd.Timedelta(minutes=minute):%Y-%m-%d %H:%M:%S},{55 + (minute + day.day) % 17}\n")
+    return lines
+
+class AppleIngestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.apple = load_script("1c_aggregate_apple.py")
+        self.apple.apple_sleep_path = os.path.join(self.tmp.name, "sleep_data.csv")
+        self.apple.apple_hr_path = os.path.join(self.tmp.name, "heart_rate_data.csv")
+        self.apple.output_path = os.path.join(self.tmp.name, "pilot_clean.csv")
+        self.apple.checkpoint_path = os.path.join(self.tmp.name, "checkpoint.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, header, lines, mode="w"):
+        with open(path, mode) as f:
+            if mode == "w":
+                f.write(header)
+            f.writelines(lines)
+
+    def pilot(self):
+        return pd.read_csv(self.apple.output_path)
+
+    def full_run(self, sleep, hr):
+        """Pilot rows from a non-incremental run over the given lines, in a separate output file."""
+        full = load_script("1c_aggregate_apple.py")
+        for name in ("apple_sleep_path", "apple_hr_path", "output_path"):
+            setattr(full, name, os.path.join(self.tmp.name, "full_" + os.path.basename(getattr(self.apple, name))))
+        self.write(full.apple_sleep_path, SLEEP_HEADER, sleep)
+        self.write(full.apple_hr_path, HR_HEADER, hr)
+        full.process_apple_data()
+        return pd.read_csv(full.output_path)
+
+class TestSleepAggregation(AppleIngestCase):
+
+    def test_stage_pivot_and_quality(self):
+        sleep_df = pd.DataFrame({
+            "Start Time": ["2022-09-01 01:00:00", "2022-09-01 03:00:00", "2022-09-01 04:00:00", "2022-09-02 01:00:00"],
+            "End Time": ["2022-09-01 03:00:00", "2022-09-01 04:00:00", "2022-09-01 04:30:00", "2022-09-02 02:00:00"],
+            "Category": ["Core", "Deep", "REM", "Awake"],
+        })
+        daily = self.apple.aggregate_sleep(sleep_df)
+        self.assertEqual(daily["Total_Sleep"].tolist(), [3.5, 1.0])
+        self.assertEqual(daily[["Light_Sleep", "Deep_Sleep", "REM_Sleep"]].iloc[0].tolist(), [2.0, 1.0, 0.5])
+        # 1.5h recovery of 3.5h -> 8.6; a night with no Deep/REM is floored at 4
+        self.assertEqual(self.apple.calculate_quality(daily).tolist(), [8.6, 4.0])
+
+class TestIncrementalIngest(AppleIngestCase):
+
+    def test_incremental_slices_match_full_run(self):
+        sleep, hr = sleep_lines(12), hr_lines(12)
+        expected = self.full_run(sleep, hr)
+
+        self.write(self.apple.apple_sleep_path, SLEEP_HEADER, [])
+        self.write(self.apple.apple_hr_path, HR_HEADER, [])
+        for start, end in ((0, 13), (13, 31), (31, 60)): # cuts inside nights
+            self.write(self.apple.apple_sleep_path, None, sleep[start:end], mode="a")
+            self.write(self.apple.apple_hr_path, None, hr[start * 5:end * 5], mode="a")
+            self.apple.process_apple_data_incremental()
+        # A half-written line is left for the next run
+        with open(self.apple.apple_hr_path, "a") as f:
+            f.write("2022-09-13 00:00:00,9")
+        self.apple.process_apple_data_incremental()
+        with open(self.apple.apple_hr_path, "a") as f:
+            f.write("9\n")
+        self.write(self.apple.apple_hr_path, None, hr[300:], mode="a")
+        self.apple.process_apple_data_incremental()
+
+        pd.testing.assert_frame_equal(self.pilot(), self.full_run(sleep, hr + ["2022-09-13 00:00:00,99\n"]))
+        self.assertEqual(len(expected), 12)
+
+    def test_rerun_without_new_data_changes_nothing(self):
+        self.write(self.apple.apple_sleep_path, SLEEP_HEADER, sleep_lines(5))
+        self.write(self.apple.apple_hr_path, HR_HEADER, hr_lines(5))
+        self.apple.process_apple_data_incremental()
+        with open(self.apple.output_path, "rb") as f:
+            pilot_bytes = f.read()
+        with open(self.apple.checkpoint_path) as f:
+            checkpoint = json.load(f)
+
+        self.apple.process_apple_data_incremental()
+        with open(self.apple.output_path, "rb") as f:
+            self.assertEqual(f.read(), pilot_bytes)
+        with open(self.apple.checkpoint_path) as f:
+            self.assertEqual(json.load(f), checkpoint)
+
+    def test_rewritten_file_is_reingested(self):
+        sleep, hr = sleep_lines(10), hr_lines(10)
+        self.write(self.apple.apple_sleep_path, SLEEP_HEADER, sleep[:20])
+        self.write(self.apple.apple_hr_path, HR_HEADER, hr[:100])
+        self.apple.process_apple_data_incremental()
+
+        # Full re-export in 1b's layout: same header, more bytes, different lines
+        rewritten = sleep_lines(10, with_hr=False)
+        self.write(self.apple.apple_sleep_path, SLEEP_HEADER, rewritten)
+        self.write(self.apple.apple_hr_path, HR_HEADER, hr)
+        self.apple.process_apple_data_incremental()
+        pd.testing.assert_frame_equal(self.pilot(), self.full_run(rewritten, hr))
+
+    def test_reordered_rewrite_does_not_double_count(self):
+        sleep, hr = sleep_lines(6), hr_lines(6)
+        self.write(self.apple.apple_sleep_path, SLEEP_HEADER, sleep)
+        self.write(self.apple.apple_hr_path, HR_HEADER, hr)
+        self.apple.process_apple_data_incremental()
+        before = self.pilot()
+
+        # Same rows, newest first, plus one more night
+        more_sleep, more_hr = sleep_lines(7), hr_lines(7)
+        self.write(self.apple.apple_sleep_path, SLEEP_HEADER, more_sleep[::-1])
+        self.write(self.apple.apple_hr_path, HR_HEADER, more_hr[::-1])
+        self.apple.process_apple_data_incremental()
+        after = self.pilot()
+        pd.testing.assert_frame_equal(after.iloc[:len(before)], before)
+        pd.testing.assert_frame_equal(after, self.full_run(more_sleep, more_hr))
+
+def export_xml(days):
+    """A minimal Apple Health export.xml with night HR samples and staged sleep."""
+    values = {"Light/Core": "AsleepCore", "Deep": "AsleepDeep", "REM": "AsleepREM", "Core": "AsleepCore", "Awake": "Awake"}
+    records = []
+    for line in hr_lines(days):
+        timestamp, bpm = line.strip().split(",")
+        records.append(f'<Record type="HKQuantityTypeIdentifierHeartRate" startDate="{timestamp} -0700" value="{bpm}"/>')
+    for line in sleep_lines(days, with_hr=False):
+        start, end, stage = line.split(",")[:3]
+        records.append(f'<Record type="HKCategoryTypeIdentifierSleepAnalysis" sourceName="Apple Watch" '
+                       f'startDate="{start} -0700" endDate="{end} -0700" value="HKCategoryValueSleepAnalysis{values[stage]}"/>')
+    records.append('<Record type="HKCategoryTypeIdentifierSleepAnalysis" startDate="2022-09-01 00:30:00 -0700" '
+                   'endDate="2022-09-01 07:00:00 -0700" value="HKCategoryValueSleepAnalysisInBed"/>')
+    return "<HealthData><Me/>" + "".join(records) + "</HealthData>"
+
+class TestExportParser(AppleIngestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.parser = load_script("1b_parse_apple_export.py")
+        self.export_path = os.path.join(self.tmp.name, "export.xml")
+
+    def parse(self, days):
+        with open(self.export_path, "w") as f:
+            f.write(export_xml(days))
+        return self.parser.parse_export(self.export_path, self.apple.apple_hr_path, self.apple.apple_sleep_path)
+
+    def test_parse_export(self):
+        self.assertEqual(self.parse(3), (len(hr_lines(3)), len(sleep_lines(3))))
+        with open(self.apple.apple_sleep_path) as f:
+            expected = [line.replace(",Core,", ",Light/Core,") for line in sleep_lines(3, with_hr=False)]
+            self.assertEqual(f.readlines(), [SLEEP_HEADER] + expected) # InBed skipped
+        with open(self.apple.apple_hr_path) as f:
+            self.assertEqual(f.readlines(), [HR_HEADER] + hr_lines(3))
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ["export.xml", "heart_rate_data.csv", "sleep_data.csv"])
+
+    def test_reexport_then_aggregate(self):
+        self.parse(4)
+        self.parser.run_aggregation(self.apple.apple_hr_path, self.apple.apple_sleep_path,
+                                    checkpoint_path=self.apple.checkpoint_path, output_path=self.apple.output_path)
+        # The next export rewrites both CSVs with the full, longer history
+        self.parse(9)
+        self.parser.run_aggregation(self.apple.apple_hr_path, self.apple.apple_sleep_path,
+                                    checkpoint_path=self.apple.checkpoint_path, output_path=self.apple.output_path)
+        pd.testing.assert_frame_equal(self.pilot(), self.full_run(sleep_lines(9, with_hr=False), hr_lines(9)))
+
+        # and later appends are still picked up incrementally
+        self.write(self.apple.apple_hr_path, None, ["2022-09-10 03:00:00,70\n"], mode="a")
+        self.write(self.apple.apple_sleep_path, None, ["2022-09-10 01:00:00,2022-09-10 08:00:00,Deep,,,Apple Watch\n"], mode="a")
+        self.apple.process_apple_data_incremental()
+        self.assertEqual(len(self.pilot()), 10)
+
+if __name__ == '__main__':
+    unittest.main()
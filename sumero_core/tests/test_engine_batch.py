@@ -0,0 +1,62 @@
+import unittest
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from sumero_core.engine import run_engine, run_engine_batch
+from sumero_core.phrasing import BRIEFING_TABLE, generate_briefing
+
+class TestEngineBatch(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        n = 2000
+        bp = [f"{s}/{d}" for s, d in zip(rng.integers(110, 145, n), rng.integers(70, 95, n))]
+        bp[:4] = ["bad", "120", "130/85/1", ""]
+        self.df = pd.DataFrame({
+            "sleep_hours": rng.choice([5.5, 5.9, 6.0, 6.5, 6.9, 7.0, 7.5, 8.2], n),
+            "stress_level": rng.integers(1, 11, n),
+            "resting_hr": rng.integers(55, 90, n),
+            "blood_pressure": bp
+        })
+
+    def test_matches_scalar_engine(self):
+        """Every batch row equals the scalar decision dict."""
+        batch = run_engine_batch(self.df)
+        for inputs, decision in zip(self.df.to_dict("records"), batch.to_dict("records")):
+            self.assertEqual(decision, run_engine(inputs))
+
+    def test_split_bp_columns(self):
+        """Pre-split systolic/diastolic columns give the same answers as BP strings."""
+        df = pd.DataFrame({
+            "sleep_hours": [8.0, 8.0, 8.0],
+            "stress_level": [3, 3, 3],
+            "resting_hr": [60, 60, 60],
+            "systolic_bp": [120, 140, 125],
+            "diastolic_bp": [80, 80, 90]
+        })
+        batch = run_engine_batch(df)
+        self.assertEqual(list(batch["health_state"]), ["Well_Recovered", "Under_Recovered", "Under_Recovered"])
+        self.assertEqual(batch["reason_codes"].iloc[1], ["HIGH_BP"])
+        self.assertTrue(batch["nap_recommended"].iloc[1])
+        self.assertFalse(batch["nap_recommended"].iloc[2])
+
+    def test_briefing_ids(self):
+        """Batch rows can carry small-int briefing IDs into the shared table."""
+        texts = run_engine_batch(self.df)["briefing"]
+        ids = run_engine_batch(self.df, briefing_ids=True)["briefing_id"]
+        self.assertLessEqual(ids.nunique(), 10)
+        self.assertEqual([BRIEFING_TABLE[i] for i in ids], list(texts))
+
+    def test_briefing_is_memoized(self):
+        first = generate_briefing("Under_Recovered", ["HIGH_STRESS"], False)
+        self.assertIs(first, generate_briefing("Under_Recovered", ("HIGH_STRESS",), False))
+
+if __name__ == '__main__':
+    unittest.main()
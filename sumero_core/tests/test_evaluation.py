@@ -0,0 +1,191 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+import threading
+import time
+import urllib.request
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from sumero_core.evaluation import (
+    Checkpoint, StubOllamaServer, agreement, evaluate, item_digest, load_instructions, percentile, summarize, user_prompt
+)
+
+def make_items(n):
+    return [{"id": i, "instruction": f"Question {i}?", "input": "Sleep Duration: 6.1",
+             "output": f"Hey! Bed by **9:{i:02d} PM** is your medicine."} for i in range(n)]
+
+class TestMetrics(unittest.TestCase):
+
+    def test_agreement(self):
+        reference = "Hey! Bed by **9:30 PM** is your medicine."
+        self.assertEqual(agreement("hey! bed by **9:30 PM** is your medicine", reference)["exact"], True)
+        partial = agreement("Go to bed at 9:30 PM tonight.", reference)
+        self.assertFalse(partial["exact"])
+        self.assertEqual(partial["key_fact_recall"], 1.0)
+        self.assertTrue(0 < partial["token_f1"] < 1)
+        self.assertIsNone(agreement("x", "no bold facts")["key_fact_recall"])
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50.5)
+        self.assertEqual(percentile(values, 100), 100)
+        self.assertEqual(percentile([3.0], 99), 3.0)
+
+class TestEvaluate(unittest.TestCase):
+
+    def test_bounded_concurrency_and_retries(self):
+        items = make_items(40)
+        lock = threading.Lock()
+        state = {"in_flight": 0, "peak": 0, "calls": {}}
+
+        def ask(item):
+            with lock:
+                state["in_flight"] += 1
+                state["peak"] = max(state["peak"], state["in_flight"])
+                calls = state["calls"][item["id"]] = state["calls"].get(item["id"], 0) + 1
+            time.sleep(0.01)
+            with lock:
+                state["in_flight"] -= 1
+            if item["id"] % 10 == 0 and calls == 1:
+                raise ConnectionError("flaky")
+            if item["id"] == 7:
+                raise ValueError("always broken")
+            return item["output"]
+
+        records = evaluate(items, ask, concurrency=4, retries=1, backoff=0)
+        self.assertEqual(len(records), 40)
+        self.assertLessEqual(state["peak"], 4)
+        self.assertGreater(state["peak"], 1)
+
+        summary = summarize(records)
+        self.assertEqual((summary["succeeded"], summary["failed"]), (39, 1))
+        self.assertEqual(summary["retried"], 5) # ids 0, 10, 20, 30 and 7
+        self.assertEqual(summary["exact_match"], 1.0)
+        self.assertLessEqual(summary["latency_p50"], summary["latency_p99"])
+
+    def test_checkpoint_resume(self):
+        items = make_items(10)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "eval.jsonl")
+            checkpoint = Checkpoint(path)
+            evaluate(items[:6], lambda item: "" if item["id"] == 2 else item["output"], checkpoint=checkpoint)
+            checkpoint.close()
+            with open(path, "a") as f:
+                f.write('{"id": 9, "answ') # torn line from a crash
+
+            asked = []
+            checkpoint = Checkpoint(path)
+            def ask(item):
+                asked.append(item["id"])
+                return item["output"]
+            evaluate(items, ask, checkpoint=checkpoint)
+            checkpoint.close()
+            self.assertEqual(sorted(asked), [6, 7, 8, 9]) # id 2 answered (badly), so not asked again
+
+            resumed = Checkpoint(path)
+            resumed.close()
+            self.assertEqual([r["id"] for r in resumed.matching(items)], list(range(10)))
+
+    def test_failed_items_are_retried_on_resume(self):
+        items = make_items(3)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "eval.jsonl")
+            checkpoint = Checkpoint(path)
+            def broken(item):
+                raise TimeoutError()
+            evaluate(items, broken, retries=0, checkpoint=checkpoint)
+            checkpoint.close()
+
+            checkpoint = Checkpoint(path)
+            records = evaluate(items, lambda item: item["output"], checkpoint=checkpoint)
+            checkpoint.close()
+            self.assertEqual(len(records), 3)
+            self.assertTrue(all(r["error"] is None for r in records))
+
+    def test_regenerated_items_are_asked_again(self):
+        items = make_items(6)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "eval.jsonl")
+            checkpoint = Checkpoint(path)
+            evaluate(items, lambda item: item["output"], checkpoint=checkpoint)
+            checkpoint.close()
+
+            # A new seed changes the greetings of some reference outputs, same line numbers
+            regenerated = [dict(item, output=item["output"].replace("Hey!", "Hi!")) if item["id"] % 2 else item for item in items]
+            self.assertNotEqual(item_digest(regenerated[1]), item_digest(items[1]))
+            asked = []
+            checkpoint = Checkpoint(path)
+            self.assertEqual(len(checkpoint.matching(regenerated)), 3)
+            def ask(item):
+                asked.append(item["id"])
+                return items[item["id"]]["output"] # the old answer
+            evaluate(regenerated, ask, checkpoint=checkpoint)
+            checkpoint.close()
+            self.assertEqual(sorted(asked), [1, 3, 5])
+
+            resumed = Checkpoint(path)
+            resumed.close()
+            summary = summarize(resumed.matching(regenerated))
+            self.assertEqual((summary["requests"], summary["exact_match"]), (6, 0.5))
+
+    def test_reordered_items_reuse_results(self):
+        items = make_items(6)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "eval.jsonl")
+            checkpoint = Checkpoint(path)
+            evaluate(items, lambda item: item["output"], checkpoint=checkpoint)
+            checkpoint.close()
+
+            # Same items at new line numbers, plus one new item
+            reordered = [dict(item, id=i) for i, item in enumerate(reversed(items + make_items(7)[6:]))]
+            asked = []
+            checkpoint = Checkpoint(path)
+            def ask(item):
+                asked.append(item["instruction"])
+                return item["output"]
+            evaluate(reordered, ask, checkpoint=checkpoint)
+            checkpoint.close()
+            self.assertEqual(asked, ["Question 6?"])
+
+            resumed = Checkpoint(path)
+            resumed.close()
+            records = resumed.matching(reordered)
+            self.assertEqual([r["id"] for r in records], list(range(7)))
+            self.assertEqual(records[1]["answer"], items[5]["output"])
+
+    def test_load_instructions_shards(self):
+        items = make_items(5)
+        with tempfile.TemporaryDirectory() as tmp:
+            for index, part in enumerate((items[:3], items[3:])):
+                with open(os.path.join(tmp, f"pilot-{index:05d}-of-00002.jsonl"), "w") as f:
+                    for item in part:
+                        f.write(json.dumps({k: v for k, v in item.items() if k != "id"}) + "\n")
+            loaded = load_instructions(os.path.join(tmp, "pilot.jsonl"))
+            self.assertEqual(loaded, items)
+            self.assertEqual(len(load_instructions(os.path.join(tmp, "pilot.jsonl"), limit=4)), 4)
+
+class TestStubServer(unittest.TestCase):
+
+    def post(self, url, item):
+        body = json.dumps({"model": "stub", "messages": [{"role": "user", "content": user_prompt(item)}], "stream": False})
+        request = urllib.request.Request(f"{url}/api/chat", data=body.encode(), headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=5) as res:
+            return json.loads(res.read())["message"]["content"]
+
+    def test_end_to_end(self):
+        items = make_items(20)
+        references = {user_prompt(item): item["output"] for item in items}
+        with StubOllamaServer(references.get, fail_every=7) as stub:
+            records = evaluate(items, lambda item: self.post(stub.url, item), concurrency=5, retries=2, backoff=0)
+        summary = summarize(records)
+        self.assertEqual(summary["succeeded"], 20)
+        self.assertGreater(summary["retried"], 0)
+        self.assertEqual(summary["exact_match"], 1.0)
+
+if __name__ == '__main__':
+    unittest.main()
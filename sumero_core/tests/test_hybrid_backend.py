@@ -0,0 +1,105 @@
+import unittest
+import sys
+import os
+import time
+from unittest import mock
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from sumero_core.evaluation import StubOllamaServer
+
+try:
+    from hybrid_backend import HybridBackend, _Failure
+    HAS_BACKEND_DEPS = True
+except ImportError: # requests / httpx / openai
+    HAS_BACKEND_DEPS = False
+
+ROW = {"health_state": "Balanced", "Occupation": "Engineer", "Age": 30, "Heart Rate": 62, "Stress Level": 4,
+       "Sleep Duration": 7.2, "Daily Steps": 8000, "Source": "AppleWatch-Raw", "Deep_Sleep": 0.8, "REM_Sleep": 1.6,
+       "BMI Category": "Normal", "Gender": "Male"}
+HEURISTIC = "Target **10:30 PM**" # the responder's bedtime advice for ROW
+
+@unittest.skipUnless(HAS_BACKEND_DEPS, "hybrid_backend needs requests, httpx and openai")
+class TestHybridBackendRouting(unittest.TestCase):
+
+    def backend(self, stub=None, **env):
+        settings = {"OLLAMA_BASE_URL": stub.url if stub else "http://127.0.0.1:9", "OLLAMA_MODEL": "stub",
+                    "SUMERO_CACHE_DB": "", "SUMERO_BREAKER_FAILURES": "3", "SUMERO_BREAKER_PROBE_INTERVAL": "60"}
+        settings.update(env)
+        with mock.patch.dict(os.environ, settings):
+            return HybridBackend()
+
+    def serve(self, answer=lambda prompt: "Lights out by **10 PM**.", **kwargs):
+        stub = StubOllamaServer(answer, **kwargs).start()
+        self.addCleanup(stub.stop)
+        return stub
+
+    def test_cache_hit_skips_model(self):
+        stub = self.serve()
+        backend = self.backend(stub)
+        self.assertEqual(backend.generate_ollama("bedtime?", ROW), "Lights out by **10 PM**.")
+        self.assertEqual(backend.generate_ollama("Bedtime?  ", ROW), "Lights out by **10 PM**.") # normalized prompt
+        self.assertEqual(stub.requests, 1)
+        # Another patient context is a different key
+        backend.generate_ollama("bedtime?", dict(ROW, Age=31))
+        self.assertEqual(stub.requests, 2)
+
+    def test_open_breaker_answers_from_heuristic(self):
+        stub = self.serve(fail_every=1)
+        backend = self.backend(stub)
+        for _ in range(3):
+            answer = backend.generate_ollama("bedtime?", ROW)
+            self.assertIn("Ollama Error", answer)
+            self.assertIn(HEURISTIC, answer)
+        answer = backend.generate_ollama("bedtime?", ROW)
+        self.assertIn("Ollama is unavailable", answer)
+        self.assertIn(HEURISTIC, answer)
+        self.assertEqual(stub.requests, 3) # no call while the breaker is open
+
+    def test_missed_first_token_deadline_falls_back(self):
+        stub = self.serve(latency=0.5)
+        backend = self.backend(stub, SUMERO_LLM_FIRST_TOKEN_DEADLINE="0.05")
+        start = time.perf_counter()
+        answer = backend.generate_ollama("bedtime?", ROW)
+        self.assertLess(time.perf_counter() - start, 0.4)
+        self.assertIn("Ollama is too slow", answer)
+        self.assertIn(HEURISTIC, answer)
+        self.assertEqual(backend.breakers["ollama"].failures, 1)
+
+    def test_fallbacks_are_not_cached(self):
+        stub = self.serve(fail_every=2)
+        backend = self.backend(stub)
+        self.assertEqual(backend.generate_ollama("first", ROW), "Lights out by **10 PM**.") # request 1 succeeds
+        self.assertIn(HEURISTIC, backend.generate_ollama("bedtime?", ROW)) # request 2 fails
+        self.assertEqual(backend.generate_ollama("bedtime?", ROW), "Lights out by **10 PM**.") # asked again
+        self.assertEqual(stub.requests, 3)
+
+        # Unreachable backend: connection error text and heuristic fallback, nothing stored
+        offline = self.backend()
+        self.assertIn("Could not reach Ollama", offline.generate_ollama("bedtime?", ROW))
+        self.assertEqual(offline.cache.stats()["entries"], 0)
+
+    def test_stream_failing_midway_is_not_cached(self):
+        backend = self.backend()
+        calls = []
+
+        def tokens(prompt, data):
+            calls.append(prompt)
+            yield "Lights out "
+            if len(calls) == 1:
+                yield _Failure("⚠️ Local Model Error: dropped")
+                return
+            yield "by **10 PM**."
+
+        first = list(backend._cached("lora", "adapter", "bedtime?", ROW, tokens))
+        self.assertEqual(first, ["Lights out ", "⚠️ Local Model Error: dropped"])
+        self.assertEqual(backend.cache.stats()["entries"], 0)
+        second = "".join(backend._cached("lora", "adapter", "bedtime?", ROW, tokens))
+        third = "".join(backend._cached("lora", "adapter", "bedtime?", ROW, tokens))
+        self.assertEqual((second, third), ("Lights out by **10 PM**.", "Lights out by **10 PM**."))
+        self.assertEqual(len(calls), 2) # third answer served from the cache
+
+if __name__ == '__main__':
+    unittest.main()
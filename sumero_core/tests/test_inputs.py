@@ -0,0 +1,33 @@
+import unittest
+import sys
+import os
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from sumero_core.engine import run_engine
+from sumero_core.inputs import EngineInput, parse_blood_pressure, split_blood_pressure
+
+class TestEngineInput(unittest.TestCase):
+
+    def test_bp_is_split_once(self):
+        record = EngineInput.from_dict({"sleep_hours": 8.0, "stress_level": 3, "resting_hr": 60, "blood_pressure": "140/90", "age": 40})
+        self.assertEqual((record.systolic_bp, record.diastolic_bp, record.bp_valid), (140, 90, True))
+        self.assertEqual(run_engine(record)["reason_codes"], ["HIGH_BP"])
+
+    def test_bad_bp_is_flagged(self):
+        """Unparseable readings fall back to 120/80 but are no longer silent."""
+        for bad in ["high", "120", "120/80/60", None]:
+            self.assertEqual(parse_blood_pressure(bad), (120, 80, False))
+        sys_bp, dia_bp, valid = split_blood_pressure(["126/83", "oops", "126/83"])
+        self.assertEqual(list(sys_bp), [126, 120, 126])
+        self.assertEqual(list(valid), [True, False, True])
+
+    def test_record_is_slotted(self):
+        record = EngineInput(sleep_hours=7.5, stress_level=4, resting_hr=62)
+        with self.assertRaises(AttributeError):
+            record.extra = 1
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+import sys
+import os
+import random
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from sumero_core.intents import HEURISTIC_CLASSIFIER, HEURISTIC_INTENTS, IntentClassifier, instruction_intent
+
+def first_match(text, intents, default):
+    """The original if/elif chain of any(x in low_p for x in [...]) checks."""
+    low_p = text.lower()
+    for intent, keywords in intents:
+        if any(x in low_p for x in keywords):
+            return intent
+    return default
+
+class TestIntentClassifier(unittest.TestCase):
+
+    def test_priority_order(self):
+        cases = {
+            "When should I go to bed?": "sleep",
+            "Can I run after a bad night of sleep?": "sleep",
+            "Can I hit the gym today?": "workout",
+            "I'm burned out and stressed at work": "stress",
+            "three cups of coffee": "heart_rate", # substring semantics: "hr" inside "three"
+            "What's my status?": "recovery",
+            "How am I doing overall?": "overview",
+            "Tell me a joke": "general",
+        }
+        for prompt, intent in cases.items():
+            self.assertEqual(HEURISTIC_CLASSIFIER.classify(prompt), intent, prompt)
+
+    def test_matches_keyword_chain(self):
+        """Random keyword soups classify exactly like the sequential substring scan."""
+        rng = random.Random(0)
+        words = [k for _, keywords in HEURISTIC_INTENTS for k in keywords] + ["the", "my", "today", "is", "x"]
+        prompts = [" ".join(rng.choice(words) for _ in range(rng.randint(0, 6))) for _ in range(2000)]
+        prompts += [p.upper() for p in prompts[:100]]
+        expected = [first_match(p, HEURISTIC_INTENTS, "general") for p in prompts]
+        self.assertEqual([HEURISTIC_CLASSIFIER.classify(p) for p in prompts], expected)
+        self.assertEqual(HEURISTIC_CLASSIFIER.classify_batch(prompts), expected)
+
+    def test_overlapping_keywords_at_same_position(self):
+        classifier = IntentClassifier([("a", ("nap time",)), ("b", ("nap",))], default="none")
+        self.assertEqual(classifier.classify("nap time?"), "a")
+        self.assertEqual(classifier.classify("a nap"), "b")
+
+    def test_instruction_intents(self):
+        self.assertEqual(instruction_intent("When today should I stop working?"), "wind_down")
+        self.assertEqual(instruction_intent("How long should I sleep tonight based on my data?"), "default")
+        self.assertEqual(instruction_intent("Best time for coffee today given my recovery?"), "focus_window")
+        self.assertEqual(instruction_intent("Should I focus on cardio or weights today?"), "workout")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from sumero_core.pilot_labels import APPLE_RULES, WHOOP_RULES, label_health_states, label_survey_frame
+
+def whoop_state(sleep, stress, disorder):
+    """The original per-row rule from 1_process_data.py."""
+    disorder = str(disorder)
+    if sleep <= 6.1 or (disorder != "nan" and disorder != "None"):
+        return "Under-Recovered"
+    elif sleep >= 7.0 and stress <= 6:
+        return "Optimal"
+    return "Balanced"
+
+class TestPilotLabels(unittest.TestCase):
+
+    def test_whoop_rules_match_row_rule(self):
+        df = pd.DataFrame({
+            "Sleep Duration": [5.9, 6.1, 6.2, 7.0, 7.0, 8.1, 7.5, 7.5],
+            "Stress Level": [3, 3, 3, 6, 7, 4, 4, 4],
+            "Sleep Disorder": [None, "None", np.nan, None, None, "Insomnia", "Sleep Apnea", "None"]
+        })
+        expected = [whoop_state(*row) for row in df.itertuples(index=False)]
+        self.assertEqual(list(label_survey_frame(df)), expected)
+
+    def test_whoop_rules_on_survey(self):
+        df = pd.read_csv(os.path.join(project_root, "Sleep_health_and_lifestyle_dataset.csv"))
+        expected = [whoop_state(s, t, d) for s, t, d in zip(df["Sleep Duration"], df["Stress Level"], df["Sleep Disorder"])]
+        self.assertEqual(list(label_survey_frame(df, WHOOP_RULES)), expected)
+
+    def test_apple_rules(self):
+        states = label_health_states(APPLE_RULES, sleep=[5.9, 6.5, 7.6, 7.6, 8.0], stress=[4, 8, 4, 5, 7])
+        self.assertEqual(list(states), ["Under-Recovered", "Under-Recovered", "Optimal", "Balanced", "Balanced"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+import sys
+import os
+import tempfile
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+import pipeline
+
+def stage(name):
+    return next(s for s in pipeline.pipeline_stages() if s["name"] == name)
+
+class TestStageCode(unittest.TestCase):
+
+    def test_preprocessing_stages_depend_on_labelling_rules(self):
+        for name, script in (("whoop", "1_process_data.py"), ("apple", "1c_aggregate_apple.py")):
+            self.assertEqual(pipeline.stage_code(stage(name)), [script, "sumero_core/pilot_labels.py", "sumero_core/storage.py"])
+
+    def test_instruction_stage_depends_on_intents_and_sampling(self):
+        self.assertEqual(pipeline.stage_code(stage("instructions")), [
+            "2_generate_instructions.py", "sumero_core/intents.py", "sumero_core/sampling.py", "sumero_core/storage.py"])
+
+    def test_imports_followed_transitively(self):
+        deps = pipeline.code_dependencies("sumero_core/engine.py")
+        self.assertIn("sumero_core/heuristics/sleep.py", deps)
+        self.assertIn("sumero_core/inputs.py", deps) # via health_states' relative import
+        self.assertNotIn("sumero_core/storage.py", deps)
+
+class TestStageHash(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = pipeline.PROJECT_ROOT
+        pipeline.PROJECT_ROOT = self.tmp.name
+        os.makedirs(os.path.join(self.tmp.name, "sumero_core"))
+        self.write("sumero_core/__init__.py", "")
+        self.write("sumero_core/rules.py", "from .thresholds import SLEEP_HOURS\n")
+        self.write("sumero_core/thresholds.py", "SLEEP_HOURS = 6.1\n")
+        self.write("step.py", "import os\nfrom sumero_core import rules\n")
+        self.stage = {"overrides": {}, "code": ["step.py"], "inputs": []}
+
+    def tearDown(self):
+        pipeline.PROJECT_ROOT = self.root
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(os.path.join(self.tmp.name, path), "w") as f:
+            f.write(text)
+
+    def test_imported_module_edit_invalidates_stage(self):
+        self.assertEqual(pipeline.stage_code(self.stage), ["step.py", "sumero_core/__init__.py", "sumero_core/rules.py", "sumero_core/thresholds.py"])
+        before = pipeline.stage_hash(self.stage)
+        self.assertEqual(pipeline.stage_hash(self.stage), before)
+        self.write("sumero_core/thresholds.py", "SLEEP_HOURS = 6.5\n")
+        self.assertNotEqual(pipeline.stage_hash(self.stage), before)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+import sys
+import os
+import threading
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from sumero_core.resilience import CircuitBreaker, DeadlineExceeded, stream_with_deadline
+
+def slow_tokens(delays):
+    for i, delay in enumerate(delays):
+        time.sleep(delay)
+        yield f"t{i}"
+
+class TestStreamWithDeadline(unittest.TestCase):
+
+    def test_passes_tokens_through(self):
+        self.assertEqual(list(stream_with_deadline(iter(["a", "b"]), 1, 1)), ["a", "b"])
+
+    def test_first_token_deadline(self):
+        start = time.monotonic()
+        with self.assertRaises(DeadlineExceeded):
+            list(stream_with_deadline(slow_tokens([1.0]), 0.05, 5))
+        self.assertLess(time.monotonic() - start, 0.5)
+
+    def test_total_deadline_keeps_partial_output(self):
+        received = []
+        with self.assertRaises(DeadlineExceeded):
+            for token in stream_with_deadline(slow_tokens([0, 0, 1.0]), 0.5, 0.1):
+                received.append(token)
+        self.assertEqual(received, ["t0", "t1"])
+
+    def test_producer_errors_propagate(self):
+        def broken():
+            yield "a"
+            raise ValueError("boom")
+        with self.assertRaises(ValueError):
+            list(stream_with_deadline(broken(), 1, 1))
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def test_trips_after_consecutive_failures(self):
+        breaker = CircuitBreaker(failure_threshold=2, probe_interval=60, probe=lambda: False)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+        self.assertEqual(breaker.trips, 1)
+
+    def test_background_probe_closes(self):
+        healthy = threading.Event()
+        breaker = CircuitBreaker(failure_threshold=1, probe_interval=0.01, probe=healthy.is_set)
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+        healthy.set()
+        deadline = time.monotonic() + 2
+        while not breaker.allow() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_half_open_without_probe(self):
+        now = [0.0]
+        breaker = CircuitBreaker(failure_threshold=1, probe_interval=10, clock=lambda: now[0])
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+        now[0] = 10
+        self.assertTrue(breaker.allow()) # one trial
+        self.assertFalse(breaker.allow())
+        breaker.record_success()
+        self.assertTrue(breaker.allow())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+import sys
+import os
+
+import pandas as pd
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from sumero_core.responder import COMMON_QUESTIONS, GREETINGS, HeuristicResponder, answer_table
+
+PILOT_CSV = os.path.join(project_root, "pilot_clean.csv")
+
+class TestHeuristicResponder(unittest.TestCase):
+
+    def setUp(self):
+        self.df = pd.read_csv(PILOT_CSV)
+
+    def test_single_answer(self):
+        row = self.df.iloc[0]
+        answer = HeuristicResponder().respond("When should I go to bed?", row, greeting="Hey!")
+        self.assertEqual(answer, f"Hey! Based on your {row['Occupation']} profile at age {row['Age']}, aim for **9:15 PM** tonight to maintain your Under-Recovered state. Consistency is your superpower.")
+
+    def test_apple_watch_stages(self):
+        row = {"health_state": "Balanced", "Occupation": "Engineer", "Age": 30, "Heart Rate": 62, "Stress Level": 4,
+               "Sleep Duration": 7.2, "Daily Steps": 8000, "Source": "AppleWatch-Raw", "Deep_Sleep": 0.8, "REM_Sleep": 1.6,
+               "BMI Category": "Normal", "Gender": "Male"}
+        responder = HeuristicResponder()
+        self.assertEqual(responder.respond("bedtime?", row, greeting="Listen:"),
+                         "Listen: Your Apple Watch shows Deep Sleep is low (0.8h). Your brain didn't get enough repair time. Target **10:30 PM** and avoid screens 1hr before.")
+        self.assertIn("Deep: 0.8h, REM: 1.6h", responder.respond("recovery status", row, greeting="Hey!"))
+
+    def test_batch_matches_single(self):
+        prompts = [COMMON_QUESTIONS[i % len(COMMON_QUESTIONS)] for i in range(len(self.df))]
+        responder = HeuristicResponder(seed=7)
+        answers = responder.respond_batch(prompts, self.df)
+        for i in range(0, len(self.df), 17):
+            greeting = next(g for g in GREETINGS if answers[i].startswith(g + " "))
+            self.assertEqual(responder.respond(prompts[i], self.df.iloc[i], greeting=greeting), answers[i])
+
+        # Seeded greetings are reproducible and independent of batching
+        tail = HeuristicResponder(seed=7).respond_batch(prompts[100:], self.df.iloc[100:], first_index=100)
+        self.assertEqual(tail, answers[100:])
+
+    def test_answer_table(self):
+        table = answer_table(COMMON_QUESTIONS[:2], self.df.head(3))
+        self.assertEqual(list(table["user_index"]), [0, 0, 1, 1, 2, 2])
+        self.assertTrue(table["answer"].str.len().gt(0).all())
+
+    def test_mismatched_batch(self):
+        with self.assertRaises(ValueError):
+            HeuristicResponder().respond_batch(["hi"], self.df.head(2))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+import sys
+import os
+import tempfile
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from sumero_core.response_cache import ResponseCache, cache_key
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class TestResponseCache(unittest.TestCase):
+
+    def test_key_normalizes_prompt(self):
+        key = cache_key("ollama", "llama3.2", "ctx", "When should I sleep?")
+        self.assertEqual(key, cache_key("ollama", "llama3.2", "ctx", "  when should i   SLEEP "))
+        self.assertNotEqual(key, cache_key("openai", "gpt-4o", "ctx", "When should I sleep?"))
+        self.assertNotEqual(key, cache_key("ollama", "llama3.2", "other ctx", "When should I sleep?"))
+
+    def test_lru_and_ttl(self):
+        clock = FakeClock()
+        cache = ResponseCache(max_entries=2, ttl=60, clock=clock)
+        cache.set("a", "A")
+        cache.set("b", "B")
+        self.assertEqual(cache.get("a"), "A") # a is now most recent
+        cache.set("c", "C") # evicts b
+        self.assertIsNone(cache.get("b"))
+
+        clock.now += 61
+        self.assertIsNone(cache.get("a"))
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"], stats["expired"]), (1, 2, 1, 1))
+
+    def test_disk_tier_survives_restart(self):
+        clock = FakeClock()
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "responses.sqlite")
+            cache = ResponseCache(db_path=db_path, clock=clock)
+            cache.set("k", "answer")
+            cache.close()
+
+            restarted = ResponseCache(db_path=db_path, clock=clock)
+            self.assertEqual(restarted.get("k"), "answer")
+            self.assertEqual(restarted.get("k"), "answer")
+            stats = restarted.stats()
+            self.assertEqual((stats["disk_hits"], stats["memory_hits"]), (1, 1))
+
+            clock.now += 3601
+            restarted._memory.clear()
+            self.assertIsNone(restarted.get("k"))
+            restarted.close()
+
+if __name__ == '__main__':
+    unittest.main()
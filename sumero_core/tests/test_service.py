@@ -0,0 +1,129 @@
+import unittest
+import sys
+import os
+import asyncio
+import http.client
+import json
+import random
+import threading
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from sumero_core.engine import run_engine
+from sumero_core.service import DecisionService, decide_batch_json, decide_json, validate_input
+
+def random_inputs(n, seed=0):
+    rng = random.Random(seed)
+    return [{
+        "sleep_hours": round(rng.uniform(3, 10), 1),
+        "stress_level": rng.randint(1, 10),
+        "resting_hr": rng.randint(50, 95),
+        "blood_pressure": f"{rng.randint(100, 150)}/{rng.randint(60, 95)}",
+    } for _ in range(n)]
+
+class TestDecisions(unittest.TestCase):
+
+    def test_matches_run_engine(self):
+        inputs = random_inputs(2000)
+        rows = [validate_input(record) for record in inputs]
+        batch = decide_batch_json(rows)
+        for record, row, encoded in zip(inputs, rows, batch):
+            expected = run_engine(record)
+            self.assertEqual(json.loads(encoded), expected)
+            self.assertEqual(json.loads(decide_json(*row)), expected)
+            self.assertEqual(encoded, decide_json(*row)) # same bytes, key order included
+
+    def test_validation(self):
+        good = {"sleep_hours": 7, "stress_level": 4, "resting_hr": 60}
+        self.assertEqual(validate_input(good), (7, 4, 60, "120/80"))
+        for bad in (
+            [],
+            {"sleep_hours": 7, "stress_level": 4},
+            dict(good, stress_level=True),
+            dict(good, stress_level=4.5),
+            dict(good, stress_level=11),
+            dict(good, sleep_hours=float("nan")),
+            dict(good, resting_hr="60"),
+            dict(good, blood_pressure="high"),
+        ):
+            with self.assertRaises(ValueError):
+                validate_input(bad)
+
+class TestService(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.loop = asyncio.new_event_loop()
+        cls.service = DecisionService(port=0, stream_threshold=50, chunk_rows=20)
+        cls.loop.run_until_complete(cls.service.start())
+        cls.thread = threading.Thread(target=cls.loop.run_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        asyncio.run_coroutine_threadsafe(cls.service.stop(), cls.loop).result()
+        cls.loop.call_soon_threadsafe(cls.loop.stop)
+        cls.thread.join()
+        cls.loop.close()
+
+    def request(self, conn, method, path, payload=None, headers=None):
+        body = None if payload is None else json.dumps(payload)
+        conn.request(method, path, body=body, headers=headers or {})
+        res = conn.getresponse()
+        return res, res.read()
+
+    def test_single_and_batch_on_one_connection(self):
+        conn = http.client.HTTPConnection("127.0.0.1", self.service.port, timeout=5)
+        inputs = random_inputs(30, seed=1)
+
+        res, body = self.request(conn, "POST", "/v1/decision", inputs[0])
+        self.assertEqual(res.status, 200)
+        self.assertEqual(json.loads(body), run_engine(inputs[0]))
+
+        res, body = self.request(conn, "POST", "/v1/decisions", {"inputs": inputs})
+        self.assertEqual(res.status, 200)
+        self.assertEqual(json.loads(body)["decisions"], [run_engine(record) for record in inputs])
+
+        res, body = self.request(conn, "POST", "/v1/decisions", {"inputs": []})
+        self.assertEqual(json.loads(body), {"decisions": []})
+        conn.close()
+
+    def test_large_batch_streams_ndjson(self):
+        conn = http.client.HTTPConnection("127.0.0.1", self.service.port, timeout=5)
+        inputs = random_inputs(75, seed=2)
+        res, body = self.request(conn, "POST", "/v1/decisions", {"inputs": inputs})
+        self.assertEqual(res.getheader("Content-Type"), "application/x-ndjson")
+        self.assertEqual(res.getheader("Transfer-Encoding"), "chunked")
+        lines = body.decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], [run_engine(record) for record in inputs])
+
+        res, body = self.request(conn, "POST", "/v1/decisions", {"inputs": inputs[:3]}, {"Accept": "application/x-ndjson"})
+        self.assertEqual(len(body.decode().splitlines()), 3)
+        conn.close()
+
+    def test_errors_and_metrics(self):
+        conn = http.client.HTTPConnection("127.0.0.1", self.service.port, timeout=5)
+        inputs = random_inputs(3, seed=3)
+        inputs[1]["stress_level"] = 42
+
+        res, body = self.request(conn, "POST", "/v1/decisions", {"inputs": inputs})
+        self.assertEqual(res.status, 400)
+        self.assertEqual(json.loads(body)["details"][0]["index"], 1)
+
+        conn.request("POST", "/v1/decision", body=b"not json")
+        res = conn.getresponse()
+        res.read()
+        self.assertEqual(res.status, 400)
+        self.assertEqual(self.request(conn, "GET", "/v1/decision")[0].status, 405)
+        self.assertEqual(self.request(conn, "GET", "/nope")[0].status, 404)
+
+        res, body = self.request(conn, "GET", "/metrics")
+        metrics = json.loads(body)
+        self.assertGreaterEqual(metrics["statuses"]["400"], 2)
+        self.assertIn("p99", metrics["latency_ms"]["/v1/decisions"])
+        conn.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+import sys
+import os
+import io
+import tempfile
+from contextlib import redirect_stdout
+
+import numpy as np
+import pandas as pd
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from sumero_core.engine import run_engine_batch
+from sumero_core.simulation import run_simulation_streaming, to_engine_inputs
+
+class TestStreamingSimulation(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        n = 1000
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_path = os.path.join(self.tmp.name, "users.csv")
+        self.df = pd.DataFrame({
+            "Sleep Duration": rng.choice([5.8, 6.4, 7.2, 8.1], n),
+            "Stress Level": rng.integers(1, 11, n),
+            "Heart Rate": rng.integers(60, 86, n),
+            "Blood Pressure": rng.choice(["120/80", "140/90", "130/85"], n)
+        })
+        self.df.to_csv(self.data_path, index=False)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_quiet(self, **kwargs):
+        with redirect_stdout(io.StringIO()):
+            return run_simulation_streaming(self.data_path, **kwargs)
+
+    def test_counts_match_full_run(self):
+        expected = run_engine_batch(to_engine_inputs(self.df))['health_state'].value_counts().to_dict()
+        summary = self.run_quiet(chunksize=97)
+        self.assertEqual(summary["total"], len(self.df))
+        self.assertEqual(summary["counts"], expected)
+
+    def test_sample_is_bounded_and_chunk_independent(self):
+        small = self.run_quiet(chunksize=64, sample_size=7)
+        large = self.run_quiet(chunksize=5000, sample_size=7)
+        self.assertEqual(len(small["samples"]), 7)
+        self.assertEqual(small["samples"], large["samples"])
+
+    def test_output_file(self):
+        output_path = os.path.join(self.tmp.name, "decisions.csv")
+        self.run_quiet(chunksize=300, output_path=output_path)
+        written = pd.read_csv(output_path)
+        self.assertEqual(list(written["user_index"]), list(range(len(self.df))))
+
+    def test_sharded_run_matches_serial(self):
+        """--workers N merges to the same report and output order as the serial run."""
+        serial_path = os.path.join(self.tmp.name, "serial.csv")
+        sharded_path = os.path.join(self.tmp.name, "sharded.csv")
+        serial = self.run_quiet(chunksize=128, sample_size=5, output_path=serial_path)
+        sharded = self.run_quiet(chunksize=128, sample_size=5, output_path=sharded_path, workers=3)
+        self.assertEqual(serial, sharded)
+        with open(serial_path, "rb") as a, open(sharded_path, "rb") as b:
+            self.assertEqual(a.read(), b.read())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import sys
+import os
+import tempfile
+
+import pandas as pd
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from unittest import mock
+
+from sumero_core.storage import iter_pilot, load_pilot, pilot_path, pilot_shards, save_pilot
+
+try:
+    import pyarrow # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+PILOT_CSV = os.path.join(project_root, "pilot_clean.csv")
+
+class TestChunkedReads(unittest.TestCase):
+
+    def assert_shards_cover(self, path):
+        expected = load_pilot(path)
+        shards = pilot_shards(path, 3)
+        self.assertEqual(len(shards), 3)
+        parts, next_row = [], 0
+        for shard in shards:
+            self.assertEqual(shard[2], next_row)
+            part = pd.concat(iter_pilot(path, chunksize=50, shard=shard), ignore_index=True)
+            parts.append(part)
+            next_row += len(part)
+        pd.testing.assert_frame_equal(pd.concat(parts, ignore_index=True).astype(object), expected.astype(object))
+
+    def test_csv_shards(self):
+        self.assert_shards_cover(PILOT_CSV)
+        chunks = list(iter_pilot(PILOT_CSV, chunksize=100))
+        self.assertEqual([len(c) for c in chunks[:-1]], [100] * (len(chunks) - 1))
+
+    @unittest.skipUnless(HAS_PYARROW, "pyarrow not installed")
+    def test_columnar_shards(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for ext in (".arrow", ".parquet"):
+                path = os.path.join(tmp, "pilot" + ext)
+                save_pilot(pd.read_csv(PILOT_CSV), path)
+                self.assert_shards_cover(path)
+
+@unittest.skipUnless(HAS_PYARROW, "pyarrow not installed")
+class TestColumnarStorage(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.df = pd.read_csv(PILOT_CSV)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        """Typed storage reads back the same values as the CSV."""
+        for ext in (".arrow", ".parquet"):
+            path = os.path.join(self.tmp.name, "pilot" + ext)
+            save_pilot(self.df, path)
+            loaded = load_pilot(path)
+            self.assertEqual(list(loaded.columns), list(self.df.columns))
+            pd.testing.assert_frame_equal(loaded.astype(object), self.df.astype(object), check_dtype=False)
+
+    def test_schema_and_projection(self):
+        path = os.path.join(self.tmp.name, "pilot.arrow")
+        save_pilot(self.df, path)
+        typed = load_pilot(path, split_bp=True)
+        self.assertEqual(str(typed["Occupation"].dtype), "category")
+        self.assertEqual(str(typed["Stress Level"].dtype), "int8")
+        self.assertEqual(str(typed["Systolic BP"].dtype), "int16")
+
+        projected = load_pilot(path, columns=["Heart Rate", "Blood Pressure"])
+        self.assertEqual(list(projected.columns), ["Heart Rate", "Blood Pressure"])
+        self.assertEqual(projected["Blood Pressure"].iloc[0], self.df["Blood Pressure"].iloc[0])
+
+class TestPilotPath(unittest.TestCase):
+
+    def test_env_read_at_call_time(self):
+        # e.g. SUMERO_PILOT_PATH set by load_dotenv() after sumero_core.storage was imported
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.dict(os.environ, {"SUMERO_PILOT_PATH": os.path.join(tmp, "pilot.csv")}):
+            self.assertEqual(pilot_path(), os.path.join(tmp, "pilot.csv"))
+            save_pilot(pd.DataFrame({"Age": [30, 41]}))
+            self.assertEqual(load_pilot()["Age"].tolist(), [30, 41])
+            self.assertEqual(len(pd.concat(iter_pilot())), 2)
+        with mock.patch.dict(os.environ, clear=True):
+            self.assertEqual(pilot_path(), "pilot_clean.csv")
+
+if __name__ == '__main__':
+    unittest.main()